@@ -0,0 +1,157 @@
+"""后台训练：在线程中运行 fit()，内核不被阻塞，可以边训练边探索
+
+numpy 的矩阵运算会释放 GIL，所以训练线程和 notebook 里的其它代码可以同时运行。
+训练进度通过队列传回来，随时可以暂停、继续、停止，或者取一份当前参数的快照。
+
+用法:
+    trainer = BackgroundTrainer(model, iterate_minibatches(X, y, 128),
+                                eval_data={'test': (X_test, y_test)}, eval_every=50)
+    plot = LivePlot(['test'])
+    plot.follow(trainer)          # 交互式后端下自动刷新；inline 后端下手动 plot.update(trainer.poll())
+    ...
+    trainer.pause(); trainer.resume()
+    snap = trainer.snapshot()     # 独立的 SimpleNN 副本，可以直接 predict
+    history = trainer.stop()
+"""
+
+import queue
+import threading
+
+from network import fit
+
+
+class BackgroundTrainer:
+    """在后台线程中训练模型，立即返回"""
+
+    def __init__(self, model, batches, lr=0.5, eval_data=None, eval_every=100,
+                 eval_samples=None, steps=None, optimizer=None, start=True):
+        """
+        参数:
+            model: SimpleNN 实例（训练期间不要在主线程中调用它的 forward/backward）
+            batches: (X, Y) 批次的可迭代对象，同 fit()
+            其余参数同 fit()；start=False 时需手动调用 start()
+        """
+        self.model = model
+        self.queue = queue.Queue()
+        self.history = {'loss': [], 'eval_step': []}
+        self.step = 0
+        self.error = None
+
+        self._batches = batches
+        self._fit_kwargs = dict(lr=lr, eval_data=eval_data, eval_every=eval_every,
+                                eval_samples=eval_samples, steps=steps, optimizer=optimizer)
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._running.set()
+        self._stopping = threading.Event()
+        self._result = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        if start:
+            self.start()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _guard(self, batches):
+        """
+        包装批次迭代器：在两步之间处理暂停/停止；
+
+        yield 位于锁内，所以每一步训练（以及紧随其后的评估）都持有锁，
+        snapshot() 拿到的永远是完整一步之后的参数。
+        """
+        for batch in batches:
+            while True:
+                self._running.wait()
+                if self._stopping.is_set():
+                    return
+                with self._lock:
+                    # pause() 可能在 wait() 返回之后、拿到锁之前清除了事件：
+                    # 这时 pause() 已经返回，不能再训练，回去等待 resume()
+                    if self._running.is_set():
+                        yield batch
+                        break
+
+    def _on_step(self, step, history):
+        """fit() 的回调：把本步的新数据放进队列"""
+        self.step = step
+        item = {'step': step, 'loss': history['loss'][-1]}
+        if history['eval_step'] and history['eval_step'][-1] == step:
+            for key, values in history.items():
+                if key.endswith('_acc'):
+                    item[key] = values[-1]
+        self.queue.put(item)
+
+    def _run(self):
+        batches = self._guard(self._batches)
+        try:
+            self._result = fit(self.model, batches, verbose=False,
+                               callback=self._on_step, **self._fit_kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            # fit() 在一步中间出错时 _guard 停在锁内的 yield 上，而 self.error 的
+            # traceback 会让它一直存活；显式关闭才能释放锁，snapshot()/pause() 不会卡住
+            batches.close()
+            self.queue.put(None)
+
+    @property
+    def running(self):
+        """训练线程是否还在运行（暂停中也算）"""
+        return self._thread.is_alive()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def pause(self):
+        """暂停；返回时正在进行的这一步已经结束"""
+        self._running.clear()
+        with self._lock:
+            pass
+
+    def resume(self):
+        self._running.set()
+
+    def stop(self, timeout=None):
+        """当前这一步结束后停止，等待线程退出，返回完整的 history"""
+        self._stopping.set()
+        self._running.set()
+        return self.join(timeout)
+
+    def join(self, timeout=None):
+        """等待训练结束，返回完整的 history；训练中出错时在这里重新抛出"""
+        self._thread.join(timeout)
+        self.poll()
+        if self.error is not None:
+            raise self.error
+        return self._result if self._result is not None else self.history
+
+    def snapshot(self):
+        """当前参数的独立副本（一个新的 SimpleNN），不会打断训练"""
+        with self._lock:
+            return self.model.copy()
+
+    def poll(self):
+        """
+        取出队列中所有新数据，追加到 self.history
+
+        返回:
+            本次取到的新条目 [{'step': ..., 'loss': ..., '<name>_acc': ...}, ...]
+        """
+        items = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                continue
+            items.append(item)
+            self.history['loss'].append(item['loss'])
+            if len(item) > 2:
+                self.history['eval_step'].append(item['step'])
+                for key, value in item.items():
+                    if key.endswith('_acc'):
+                        self.history.setdefault(key, []).append(value)
+        return items
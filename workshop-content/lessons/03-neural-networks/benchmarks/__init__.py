@@ -0,0 +1,2 @@
+# benchmarks - 课程引擎 (network.py 等) 的性能基准
+# Run from the lesson directory, e.g. `python -m benchmarks.optimizers`
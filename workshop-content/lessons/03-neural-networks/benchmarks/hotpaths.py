@@ -0,0 +1,217 @@
+"""network.py 热点路径基准：forward / backward / update / predict / fit / train / notebook 吞吐
+
+全部使用合成数据，离线即可运行。扫描网络规模（加法器到 MNIST 大小）、
+批量大小和数据类型，结果保存为 JSON；compare 模式与基线对比并标出变慢的项。
+
+用法（在 03-neural-networks 目录下运行）:
+    python -m benchmarks.hotpaths run --out baseline.json
+    python -m benchmarks.hotpaths run --quick --out new.json
+    python -m benchmarks.hotpaths compare baseline.json new.json --threshold 0.1
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from dataset import BatchIterator, normalize
+from loader import PrefetchLoader
+from network import SimpleNN, fit, iterate_minibatches, train
+
+
+LAYER_DIMS = {
+    'adder': [20, 16, 16, 10],
+    'mnist-small': [784, 64, 64, 10],
+    'mnist': [784, 128, 64, 10],
+}
+BATCH_SIZES = [32, 256, 1024]
+DTYPES = ['float64', 'float32']
+PREDICT_SAMPLES = 10000
+TRAIN_SAMPLES = 8192
+
+
+def measure(fn, min_time=0.05, repeats=5):
+    """
+    单次调用耗时（秒）
+
+    先估计循环次数使每轮至少 min_time 秒，再重复 repeats 轮取最小值，
+    以减少其它进程的干扰。
+    """
+    fn()
+    n = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        n *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+    best = elapsed
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / n
+
+
+def notebook_epoch(model, loader, eval_sets, lr, chunk_size=10000):
+    """
+    neural_networks.ipynb 里 train() 的一个 epoch（那里的网络换成 SimpleNN）：
+    PrefetchLoader 取 uint8 数据归一化后的批次训练，再在每个评估集上分块归一化、预测
+    """
+    for X_batch, y_batch in loader:
+        model.forward(X_batch)
+        model.loss(y_batch)
+        model.backward(y_batch)
+        model.update(lr)
+    for X, y in eval_sets:
+        for lo in range(0, X.shape[1], chunk_size):
+            np.sum(model.predict(normalize(X[:, lo:lo + chunk_size], model.dtype))
+                   == y[lo:lo + chunk_size])
+
+
+def bench_case(name, layer_dims, batch_size, dtype, min_time):
+    """一个 (网络, 批量, 类型) 组合的各项耗时"""
+    rng = np.random.default_rng(0)
+    np.random.seed(0)
+    n_in, n_out = layer_dims[0], layer_dims[-1]
+    X = rng.random((n_in, batch_size)).astype(dtype)
+    y = rng.integers(0, n_out, batch_size)
+
+    model = SimpleNN(layer_dims, dtype=dtype).use_workspace(batch_size)
+    model.forward(X)
+    model.backward(y)
+
+    timings = {
+        'forward': measure(lambda: model.forward(X), min_time),
+        'backward': measure(lambda: model.backward(y), min_time),
+    }
+    # 同一个梯度会被反复应用，计时后恢复参数，后面的 predict 仍在初始参数上计时
+    params = model.flat_params.copy()
+    timings['update'] = measure(lambda: model.update(0.01), min_time)
+    model.flat_params[...] = params
+
+    X_pred = rng.random((n_in, PREDICT_SAMPLES)).astype(dtype)
+    y_pred = rng.integers(0, n_out, PREDICT_SAMPLES)
+    timings['predict'] = measure(lambda: model.predict(X_pred), min_time)
+
+    # 端到端: fit 一个 epoch（打乱、切批、前向、损失、反向、更新）
+    X_train = rng.random((n_in, TRAIN_SAMPLES)).astype(dtype)
+    y_train = rng.integers(0, n_out, TRAIN_SAMPLES)
+    timings['fit'] = measure(
+        lambda: fit(model, iterate_minibatches(X_train, y_train, batch_size),
+                    lr=0.01, verbose=False),
+        min_time, repeats=3)
+
+    # network.train(): 在 fit 之外每个 epoch 还要在训练集和测试集上算准确率
+    timings['train'] = measure(
+        lambda: train(model, X_train, y_train, X_pred, y_pred, epochs=1, lr=0.01,
+                      print_every=0, batch_size=batch_size),
+        min_time, repeats=3)
+
+    # notebook 自己的训练循环: load_mnist 式的 uint8 数据（按样本存放的转置视图）
+    X_uint8 = rng.integers(0, 256, (TRAIN_SAMPLES, n_in), dtype=np.uint8).T
+    X_test = rng.integers(0, 256, (PREDICT_SAMPLES, n_in), dtype=np.uint8).T
+    batches = BatchIterator(X_uint8, y_train, batch_size, dtype=dtype, drop_last=True)
+    with PrefetchLoader(batches) as loader:
+        timings['notebook'] = measure(
+            lambda: notebook_epoch(model, loader, [(X_uint8, y_train), (X_test, y_pred)], 0.01),
+            min_time, repeats=3)
+
+    samples = {'forward': batch_size, 'backward': batch_size, 'update': batch_size,
+               'predict': PREDICT_SAMPLES, 'fit': TRAIN_SAMPLES, 'train': TRAIN_SAMPLES,
+               'notebook': len(batches) * batch_size}
+    return [{
+        'case': f'{name}/b{batch_size}/{dtype}',
+        'layer_dims': layer_dims, 'batch_size': batch_size, 'dtype': dtype,
+        'op': op, 'seconds': seconds, 'samples_per_s': samples[op] / seconds,
+    } for op, seconds in timings.items()]
+
+
+def run(args):
+    names = ['adder', 'mnist'] if args.quick else list(LAYER_DIMS)
+    batch_sizes = [256] if args.quick else BATCH_SIZES
+    min_time = 0.02 if args.quick else 0.05
+
+    results = []
+    print(f"{'case':<28} {'op':<9} {'time':>12} {'samples/s':>12}")
+    for name in names:
+        for batch_size in batch_sizes:
+            for dtype in DTYPES:
+                for r in bench_case(name, LAYER_DIMS[name], batch_size, dtype, min_time):
+                    print(f"{r['case']:<28} {r['op']:<9} {r['seconds'] * 1e6:>10.1f}us "
+                          f"{r['samples_per_s']:>12.0f}")
+                    results.append(r)
+
+    report = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n结果已保存到 {args.out}")
+
+
+def compare(args):
+    """对比两次结果；耗时增加超过 threshold 的项记为回退，有回退时返回码为 1"""
+    with open(args.baseline) as f:
+        base = {(r['case'], r['op']): r for r in json.load(f)['results']}
+    with open(args.current) as f:
+        current = json.load(f)['results']
+
+    regressions = 0
+    print(f"{'case':<28} {'op':<9} {'base':>10} {'current':>10} {'change':>8}")
+    for r in current:
+        b = base.get((r['case'], r['op']))
+        if b is None:
+            continue
+        change = r['seconds'] / b['seconds'] - 1
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif change < -args.threshold:
+            flag = '  faster'
+        print(f"{r['case']:<28} {r['op']:<9} {b['seconds'] * 1e6:>8.1f}us "
+              f"{r['seconds'] * 1e6:>8.1f}us {change:>+7.1%}{flag}")
+
+    print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_run = sub.add_parser('run', help='运行基准')
+    p_run.add_argument('--out', help='保存结果的 JSON 路径')
+    p_run.add_argument('--quick', action='store_true', help='缩小扫描范围')
+
+    p_cmp = sub.add_parser('compare', help='与基线对比')
+    p_cmp.add_argument('baseline')
+    p_cmp.add_argument('current')
+    p_cmp.add_argument('--threshold', type=float, default=0.10,
+                       help='耗时增加超过该比例视为回退（默认 0.10）')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""优化器收敛速度基准：达到目标准确率所需的步数和时间
+
+在两个任务上对比 SGD / Momentum / RMSProp / Adam：
+    - adder: how_neural_networks_work.ipynb 中的一位数加法（20 维 one-hot 输入）
+    - mnist: 手写数字识别（使用 dataset.load_mnist 的共享缓存，或 data/MNIST/raw 下的 IDX 文件，缺失时跳过）
+
+用法（在 03-neural-networks 目录下运行）:
+    python -m benchmarks.optimizers
+    python -m benchmarks.optimizers --tasks adder --repeats 5 --json optim.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from dataset import load_mnist, normalize
+from network import SimpleNN, accuracy, fit, iterate_minibatches
+from optim import SGD, Momentum, RMSProp, Adam
+
+
+# 每个任务各优化器的学习率（粗调过，保证都能收敛）
+OPTIMIZERS = {
+    'adder': {
+        'sgd': (SGD, {'lr': 0.5}),
+        'momentum': (Momentum, {'lr': 0.5, 'beta': 0.9}),
+        'rmsprop': (RMSProp, {'lr': 0.01}),
+        'adam': (Adam, {'lr': 0.01}),
+    },
+    'mnist': {
+        'sgd': (SGD, {'lr': 0.1}),
+        'momentum': (Momentum, {'lr': 0.1, 'beta': 0.9}),
+        'rmsprop': (RMSProp, {'lr': 0.001}),
+        'adam': (Adam, {'lr': 0.001}),
+    },
+}
+
+
+def adder_task():
+    """所有 a + b < 10 的组合；全部样本既用于训练也用于判断是否学会"""
+    pairs = [(a, b) for a in range(10) for b in range(10 - a)]
+    X = np.zeros((20, len(pairs)), dtype=np.float32)
+    for i, (a, b) in enumerate(pairs):
+        X[a, i] = 1
+        X[10 + b, i] = 1
+    y = np.array([a + b for a, b in pairs])
+    return {
+        'layer_dims': [20, 16, 16, 10],
+        'train': (X, y),
+        'eval': (X, y),
+        'batch_size': X.shape[1],
+        'target': 1.0,
+        'eval_every': 10,
+        'max_steps': 5000,
+    }
+
+
+def mnist_task(data_dir, eval_samples=2000):
+    """MNIST；在固定抽取的部分测试集上判断是否达到目标"""
+    try:
+        X, y, X_test, y_test = load_mnist(raw_dir=data_dir)
+    except FileNotFoundError:
+        return None
+    idx = np.random.default_rng(0).choice(X_test.shape[1], eval_samples, replace=False)
+    return {
+        'layer_dims': [784, 64, 64, 10],
+        'train': (X, y),
+        'eval': (normalize(X_test[:, idx]), y_test[idx]),
+        'batch_size': 128,
+        'target': 0.95,
+        'eval_every': 100,
+        'max_steps': 20000,
+    }
+
+
+def _batch_stream(X, Y, batch_size):
+    """无限循环的 mini-batch 流；uint8 图像逐批归一化"""
+    while True:
+        for X_batch, Y_batch in iterate_minibatches(X, Y, batch_size):
+            if X_batch.dtype == np.uint8:
+                X_batch = normalize(X_batch)
+            yield X_batch, Y_batch
+
+
+def time_to_target(task, opt_cls, opt_kwargs, seed, dtype=np.float32):
+    """
+    训练直到评估准确率达到 task['target']
+
+    返回:
+        (steps, seconds, acc)；未达到目标时 steps 为 None。
+        seconds 只统计训练时间，不含评估。
+    """
+    np.random.seed(seed)
+    model = SimpleNN(task['layer_dims'], dtype=dtype)
+    optimizer = opt_cls(model, **opt_kwargs)
+    batches = _batch_stream(*task['train'], task['batch_size'])
+
+    steps, seconds, acc = 0, 0.0, 0.0
+    while steps < task['max_steps']:
+        start = time.perf_counter()
+        fit(model, batches, eval_every=task['eval_every'], steps=task['eval_every'],
+            verbose=False, optimizer=optimizer)
+        seconds += time.perf_counter() - start
+        steps += task['eval_every']
+
+        acc = accuracy(model, *task['eval'])
+        if acc >= task['target']:
+            return steps, seconds, acc
+    return None, seconds, acc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', nargs='+', default=['adder', 'mnist'], choices=['adder', 'mnist'])
+    parser.add_argument('--optimizers', nargs='+', default=list(OPTIMIZERS['adder']))
+    parser.add_argument('--repeats', type=int, default=3, help='不同随机种子的重复次数')
+    parser.add_argument('--mnist-dir', default='data/MNIST/raw')
+    parser.add_argument('--json', help='把结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    tasks = {'adder': adder_task, 'mnist': lambda: mnist_task(args.mnist_dir)}
+    results = []
+    for task_name in args.tasks:
+        task = tasks[task_name]()
+        if task is None:
+            print(f"[{task_name}] 跳过：找不到数据 ({args.mnist_dir})")
+            continue
+
+        print(f"\n[{task_name}] target accuracy {task['target']:.0%}")
+        print(f"{'optimizer':<10} {'steps':>8} {'seconds':>9} {'reached':>8}")
+        for opt_name in args.optimizers:
+            opt_cls, opt_kwargs = OPTIMIZERS[task_name][opt_name]
+            runs = [time_to_target(task, opt_cls, opt_kwargs, seed) for seed in range(args.repeats)]
+            reached = [r for r in runs if r[0] is not None]
+            steps = np.median([r[0] for r in reached]) if reached else float('nan')
+            seconds = np.median([r[1] for r in reached]) if reached else float('nan')
+            print(f"{opt_name:<10} {steps:>8.0f} {seconds:>9.3f} {len(reached):>5}/{len(runs)}")
+            results.append({
+                'task': task_name, 'optimizer': opt_name, 'params': opt_kwargs,
+                'target': task['target'], 'median_steps': steps, 'median_seconds': seconds,
+                'reached': len(reached), 'runs': len(runs),
+            })
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""数据并行扩展性基准：1 到 4 个工作进程的训练吞吐
+
+在合成的 MNIST 大小数据上，对比单进程 fit() 与 DataParallel 在不同进程数下
+每秒处理的样本数，并检查同一随机种子两次运行结果是否完全一致。
+
+用法（在 03-neural-networks 目录下运行）:
+    python -m benchmarks.parallel
+    python -m benchmarks.parallel --workers 1 2 4 --batch-size 1024 --steps 50
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from network import SimpleNN, fit, iterate_minibatches
+from parallel import DataParallel
+
+
+def synthetic_data(n_samples, n_in, n_classes, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((n_in, n_samples), dtype=np.float32)
+    y = rng.integers(0, n_classes, n_samples)
+    return X, y
+
+
+def run(layer_dims, X, y, batch_size, steps, n_workers, seed=0):
+    """训练 steps 步，返回 (秒数, 最终参数)；n_workers=0 表示单进程"""
+    np.random.seed(seed)
+    model = SimpleNN(layer_dims, dtype=np.float32)
+    batches = iterate_minibatches(X, y, batch_size)
+
+    if n_workers == 0:
+        model.use_workspace(batch_size)
+        start = time.perf_counter()
+        fit(model, batches, lr=0.1, steps=steps, verbose=False)
+        return time.perf_counter() - start, model.flat_params.copy()
+
+    with DataParallel(model, n_workers=n_workers, batch_size=batch_size) as dp:
+        # 第一步包含工作进程的预热（建立工作区），不计时
+        fit(dp, batches, lr=0.1, steps=1, verbose=False)
+        start = time.perf_counter()
+        fit(dp, batches, lr=0.1, steps=steps - 1, verbose=False)
+        seconds = time.perf_counter() - start
+    return seconds * steps / (steps - 1), model.flat_params.copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--layer-dims', type=int, nargs='+', default=[784, 256, 128, 10])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 3, 4])
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--steps', type=int, default=40)
+    args = parser.parse_args()
+
+    n_samples = args.batch_size * args.steps
+    X, y = synthetic_data(n_samples, args.layer_dims[0], args.layer_dims[-1])
+
+    base, _ = run(args.layer_dims, X, y, args.batch_size, args.steps, n_workers=0)
+    print(f"layer_dims={args.layer_dims} batch_size={args.batch_size} steps={args.steps}")
+    print(f"{'workers':>8} {'samples/s':>11} {'speedup':>8} {'deterministic':>14}")
+    print(f"{'single':>8} {n_samples / base:>11.0f} {1.0:>8.2f} {'-':>14}")
+    for n in args.workers:
+        seconds, p1 = run(args.layer_dims, X, y, args.batch_size, args.steps, n)
+        _, p2 = run(args.layer_dims, X, y, args.batch_size, args.steps, n)
+        print(f"{n:>8} {n_samples / seconds:>11.0f} {base / seconds:>8.2f} "
+              f"{str(np.array_equal(p1, p2)):>14}")
+
+
+if __name__ == '__main__':
+    main()
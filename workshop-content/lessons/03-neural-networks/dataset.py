@@ -0,0 +1,267 @@
+"""共享的 MNIST 数据缓存：IDX 只解压一次，之后所有容器内存映射同一份 uint8 文件
+
+原来每个内核都要解压 IDX 并转成浮点数组（X_train 单独就是几百 MB），
+100 个学生就是 100 份。现在:
+    - IDX 文件只转换一次，存为 datasets/mnist/*.npy（uint8，图像按样本存放 (n, 784)）
+    - 每个内核用 np.load(mmap_mode='r') 只读映射，所有容器共享宿主机页缓存
+    - 标签保持 uint8 类别下标，不再生成 one-hot 矩阵
+    - 归一化到 [0, 1] 推迟到每个 batch 再做（normalize）
+
+pre_spawn_hook 把 workshop-content 挂载到 /opt/workshop，所以默认目录是
+/opt/workshop/datasets（可用环境变量 WORKSHOP_DATASETS 覆盖）。学生的挂载是只读的，
+管理员先转换一次:
+    python dataset.py --raw data/MNIST/raw --root /opt/workshop/datasets
+
+用法:
+    X_train, y_train, X_test, y_test = load_mnist()
+    X_batch = normalize(X_train[:, idx])      # (784, batch) float32
+    for X_batch, y_batch in BatchIterator(X_train, y_train, batch_size=128):
+        ...                                   # 一个 epoch；缓冲区复用，不复制数据集
+"""
+
+import argparse
+import gzip
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+
+DATA_ROOT = os.environ.get('WORKSHOP_DATASETS', '/opt/workshop/datasets')
+
+# 用户本地的备用缓存：共享目录里没有转换好的文件且不可写时使用
+USER_CACHE = Path.home() / '.cache' / 'ml-workshop' / 'datasets'
+
+MNIST_FILES = {
+    'train_images': 'train-images-idx3-ubyte',
+    'train_labels': 'train-labels-idx1-ubyte',
+    'test_images': 't10k-images-idx3-ubyte',
+    'test_labels': 't10k-labels-idx1-ubyte',
+}
+
+
+def read_idx(path):
+    """读取一个 IDX 文件（.gz 或未压缩），返回 uint8 数组"""
+    path = Path(path)
+    opener = gzip.open if path.suffix == '.gz' else open
+    with opener(path, 'rb') as f:
+        magic = struct.unpack('>I', f.read(4))[0]
+        ndim = magic & 0xFF
+        shape = struct.unpack('>' + 'I' * ndim, f.read(4 * ndim))
+        return np.frombuffer(f.read(), dtype=np.uint8).reshape(shape)
+
+
+def _find_idx(raw_dir, name):
+    for suffix in ('.gz', ''):
+        path = Path(raw_dir) / (name + suffix)
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"{name}[.gz] not found in {raw_dir}")
+
+
+def convert_mnist(raw_dir='data/MNIST/raw', root=DATA_ROOT):
+    """
+    把 IDX 文件转换成 root/mnist/*.npy（只需要做一次）
+
+    参数:
+        raw_dir: IDX 文件所在目录
+        root: 数据集根目录
+    返回:
+        写入的目录
+    """
+    out = Path(root) / 'mnist'
+    out.mkdir(parents=True, exist_ok=True)
+    for key, name in MNIST_FILES.items():
+        data = read_idx(_find_idx(raw_dir, name))
+        if key.endswith('images'):
+            data = data.reshape(len(data), -1)
+        # 先写临时文件再改名，避免其它进程读到写了一半的文件
+        tmp = out / f'.{key}.npy.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, np.ascontiguousarray(data))
+        os.replace(tmp, out / f'{key}.npy')
+    return out
+
+
+def _mnist_dir(root, raw_dir):
+    """找到已转换的目录；都没有时从 raw_dir 转换到第一个可写的位置"""
+    candidates = [Path(root) / 'mnist', USER_CACHE / 'mnist']
+    for path in candidates:
+        if all((path / f'{key}.npy').exists() for key in MNIST_FILES):
+            return path
+    _find_idx(raw_dir, MNIST_FILES['train_images'])
+    for base in (Path(root), USER_CACHE):
+        try:
+            return convert_mnist(raw_dir, base)
+        except FileNotFoundError:
+            raise
+        except OSError as e:
+            # 只读挂载（学生容器）或没有权限：换下一个位置
+            error = e
+    raise error
+
+
+def load_mnist(root=DATA_ROOT, raw_dir='data/MNIST/raw'):
+    """
+    加载 MNIST（只读内存映射，几乎不占内存，也不需要等待解压）
+
+    参数:
+        root: 数据集根目录，其下为 mnist/*.npy
+        raw_dir: 还没有转换过时，从这里读取 IDX 文件转换
+    返回:
+        X_train: (784, 60000) uint8，像素 0..255；是 (60000, 784) 映射数组的转置视图
+        y_train: (60000,) uint8 类别下标
+        X_test: (784, 10000) uint8
+        y_test: (10000,) uint8
+    """
+    path = _mnist_dir(root, raw_dir)
+    arrays = {key: np.load(path / f'{key}.npy', mmap_mode='r') for key in MNIST_FILES}
+    return (arrays['train_images'].T, arrays['train_labels'],
+            arrays['test_images'].T, arrays['test_labels'])
+
+
+def normalize(X, dtype=np.float32, out=None):
+    """
+    uint8 像素归一化到 [0, 1]；只对取出来的这一批做，不修改原数组
+
+    参数:
+        X: uint8 数组（如一个 batch）
+        dtype: 输出类型
+        out: 可选的输出缓冲区，重复使用可避免每批分配
+    """
+    return np.multiply(X, np.asarray(1 / 255, dtype=dtype), out=out, dtype=dtype)
+
+
+def one_hot(y, n_classes=10, dtype=np.float32):
+    """类别下标 (m,) 转 one-hot (n_classes, m)，只在需要时对一个 batch 调用"""
+    Y = np.zeros((n_classes, len(y)), dtype=dtype)
+    Y[y, np.arange(len(y))] = 1
+    return Y
+
+
+class BatchIterator:
+    """
+    打乱顺序的 mini-batch 迭代器，每个 epoch 不再复制整个数据集
+
+    数据按样本存放（每个样本一行，C 连续），每一批按下标把若干行直接 gather 到
+    预先分配、反复使用的缓冲区里，再只对这一批做 uint8 → 浮点和 one-hot 转换。
+    产出的 X 是 (features, batch) 的转置视图，可以直接交给 forward()。
+
+    注意: 每一批都写在同一块缓冲区里，下一批会覆盖上一批；需要保留时请 .copy()。
+
+    用法:
+        batches = BatchIterator(X_train, y_train, batch_size=128)
+        for epoch in range(epochs):
+            for X_batch, y_batch in batches:      # 每次 iter() 是一个新 epoch
+                ...
+        fit(model, itertools.chain.from_iterable(itertools.repeat(batches, 10)))
+    """
+
+    def __init__(self, X, y, batch_size=128, shuffle=True, one_hot=True, n_classes=10,
+                 dtype=np.float32, drop_last=False):
+        """
+        参数:
+            X: (features, m) 数据，如 load_mnist() 返回的 uint8 映射数组；
+                若它本身是按样本存放数组的转置视图则不复制
+            y: (m,) 整数类别下标
+            batch_size: 每批样本数
+            shuffle: 每个 epoch 是否打乱顺序（使用全局随机数，np.random.seed 可复现）
+            one_hot: True 时标签输出 (n_classes, batch) one-hot，否则输出 (batch,) 下标
+            n_classes: one-hot 的类别数
+            dtype: 输出图像的浮点类型；uint8 数据会同时归一化到 [0, 1]
+            drop_last: 是否丢弃最后不足 batch_size 的一批
+        """
+        # (m, features)；对 load_mnist 的结果来说 X.T 就是映射数组本身，不复制
+        self.data = np.ascontiguousarray(X.T)
+        self.labels = np.asarray(y)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.one_hot = one_hot
+        self.drop_last = drop_last
+        self.n_classes = n_classes
+        self.dtype = np.dtype(dtype)
+
+        # 数据类型不同时先 gather 到原始类型的缓冲区，再转换
+        self._raw = (None if self.data.dtype == self.dtype
+                     else np.empty((batch_size, self.data.shape[1]), dtype=self.data.dtype))
+        self._cols = np.arange(batch_size)
+        self._buffers = None
+
+    @property
+    def n_samples(self):
+        return len(self.data)
+
+    def __len__(self):
+        m, b = self.n_samples, self.batch_size
+        return m // b if self.drop_last else -(-m // b)
+
+    def new_buffers(self):
+        """
+        一组输出缓冲区 (X, Y)
+
+        返回:
+            X: (batch_size, features) 按样本存放
+            Y: (n_classes, batch_size) one-hot，或 (batch_size,) 类别下标
+        """
+        X = np.empty((self.batch_size, self.data.shape[1]), dtype=self.dtype)
+        if self.one_hot:
+            Y = np.zeros((self.n_classes, self.batch_size), dtype=self.dtype)
+        else:
+            Y = np.empty(self.batch_size, dtype=self.labels.dtype)
+        return X, Y
+
+    def gather(self, idx, buffers):
+        """
+        把下标为 idx 的样本写进 buffers（new_buffers() 的结果，或同形状的共享内存）
+
+        返回:
+            X: (n, features) 按样本存放的视图；转置后才是 forward() 要的格式
+            Y: (n_classes, n) 或 (n,) 视图
+        """
+        n = len(idx)
+        X = buffers[0][:n]
+        if self._raw is None:
+            np.take(self.data, idx, axis=0, out=X)
+        else:
+            raw = self._raw[:n]
+            np.take(self.data, idx, axis=0, out=raw)
+            if raw.dtype == np.uint8:
+                normalize(raw, self.dtype, out=X)
+            else:
+                X[...] = raw
+
+        Y = buffers[1][..., :n]
+        if self.one_hot:
+            Y.fill(0)
+            Y[self.labels[idx], self._cols[:n]] = 1
+        else:
+            np.take(self.labels, idx, out=Y)
+        return X, Y
+
+    def epoch(self):
+        """新一个 epoch 里每一批的样本下标"""
+        m, b = self.n_samples, self.batch_size
+        order = np.random.permutation(m) if self.shuffle else np.arange(m)
+        stop = m - m % b if self.drop_last else m
+        return [order[start:start + b] for start in range(0, stop, b)]
+
+    def __iter__(self):
+        if self._buffers is None:
+            self._buffers = self.new_buffers()
+        for idx in self.epoch():
+            X, Y = self.gather(idx, self._buffers)
+            yield X.T, Y
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把 MNIST IDX 文件转换为可内存映射的 .npy')
+    parser.add_argument('--raw', default='data/MNIST/raw', help='IDX 文件目录')
+    parser.add_argument('--root', default=DATA_ROOT, help='数据集根目录')
+    args = parser.parse_args()
+    out = convert_mnist(args.raw, args.root)
+    print(f"已写入 {out}")
+
+
+if __name__ == '__main__':
+    main()
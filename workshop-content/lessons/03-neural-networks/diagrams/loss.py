@@ -1,40 +1,119 @@
 """损失函数与优化可视化 / Loss function and optimization visualizations"""
 
+import weakref
+
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 
 
-def plot_loss_landscape(w_range=(-2, 2), b_range=(-2, 2), loss_fn=None):
+# 每块最多计算的网格点数，限制数组化损失函数的中间结果大小
+TILE_POINTS = 65536
+
+# 每个 loss_fn 最多缓存几组 (范围, 分辨率) 的曲面
+SURFACES_PER_FN = 8
+
+# loss_fn → {(w_range, b_range, resolution): (W, B, L)}；只弱引用 loss_fn，
+# 它（如持有数据集的 LossLandscape）不再被使用时对应的曲面随之释放
+_SURFACES = weakref.WeakKeyDictionary()
+
+
+def quadratic_loss(w, b):
+    """示例损失函数：简单的二次函数（对数组逐元素计算）"""
+    return w**2 + b**2 + 0.5 * w * b
+
+
+def _is_array_native(loss_fn):
+    """用一个 2x3 的小网格试探 loss_fn 能否直接接受数组并逐元素返回"""
+    # 非方阵：矩阵乘法之类的非逐元素运算要么报错，要么得到不同的形状
+    w = np.array([[0.0, 0.5, 1.0], [1.5, 2.0, 2.5]])
+    b = np.array([[1.0, -1.0, 0.5], [0.0, 2.0, -0.5]])
+    try:
+        out = np.asarray(loss_fn(w, b))
+    except Exception:
+        return False
+    return out.shape == w.shape
+
+
+def _surface(loss_fn, w_range, b_range, resolution):
+    key = (w_range, b_range, resolution)
+    try:
+        cache = _SURFACES.setdefault(loss_fn, {})
+    except TypeError:
+        # 不能弱引用（或不可哈希）的 loss_fn 不缓存
+        cache = {}
+    if key not in cache:
+        if len(cache) >= SURFACES_PER_FN:
+            del cache[next(iter(cache))]
+        cache[key] = _compute_surface(loss_fn, *key)
+    return cache[key]
+
+
+def _compute_surface(loss_fn, w_range, b_range, resolution):
+    w = np.linspace(w_range[0], w_range[1], resolution)
+    b = np.linspace(b_range[0], b_range[1], resolution)
+    W, B = np.meshgrid(w, b)
+
+    if _is_array_native(loss_fn):
+        # 按行分块计算，每块不超过 TILE_POINTS 个点
+        L = np.empty_like(W)
+        rows = max(1, TILE_POINTS // resolution)
+        for r in range(0, resolution, rows):
+            L[r:r + rows] = loss_fn(W[r:r + rows], B[r:r + rows])
+    else:
+        L = np.vectorize(loss_fn, otypes=[float])(W, B)
+
+    # 结果会被缓存复用，设为只读防止被意外修改
+    for a in (W, B, L):
+        a.flags.writeable = False
+    return W, B, L
+
+
+def loss_surface(loss_fn=None, w_range=(-2, 2), b_range=(-2, 2), resolution=100):
+    """
+    在 resolution x resolution 的网格上计算 loss_fn(w, b)
+
+    能直接接受数组的 loss_fn 整块计算（分块控制内存），否则退回逐点的 np.vectorize。
+    结果按 (loss_fn, 范围, 分辨率) 缓存，交互控件重复绘制同一曲面时不会重新计算；
+    因此 loss_fn 最好定义一次反复使用，每次新建的 lambda 不会命中缓存。
+    缓存只弱引用 loss_fn，loss_fn 被释放后它的曲面也随之释放。
+
+    Returns:
+        W, B, L: (resolution, resolution) 只读数组
+    """
+    if loss_fn is None:
+        loss_fn = quadratic_loss
+    return _surface(loss_fn, tuple(map(float, w_range)), tuple(map(float, b_range)),
+                    int(resolution))
+
+
+def plot_loss_landscape(w_range=(-2, 2), b_range=(-2, 2), loss_fn=None, resolution=50,
+                        labels=('w', 'b')):
     """
     绘制 3D 损失曲面
 
     Args:
         w_range: 权重范围 (min, max)
         b_range: 偏置范围 (min, max)
-        loss_fn: 损失函数 loss_fn(w, b) -> scalar，默认使用示例函数
+        loss_fn: 损失函数 loss_fn(w, b)，最好能直接接受数组；默认使用 quadratic_loss
+        resolution: 每个方向的网格点数
+        labels: 两个坐标轴的名字（如 landscape.LossLandscape 的 ('α', 'β')）
     """
-    if loss_fn is None:
-        # 示例损失函数：简单的二次函数
-        loss_fn = lambda w, b: w**2 + b**2 + 0.5 * w * b
-
-    w = np.linspace(w_range[0], w_range[1], 50)
-    b = np.linspace(b_range[0], b_range[1], 50)
-    W, B = np.meshgrid(w, b)
-    L = np.vectorize(loss_fn)(W, B)
+    W, B, L = loss_surface(loss_fn, w_range, b_range, resolution)
 
     fig = plt.figure(figsize=(10, 8))
     ax = fig.add_subplot(111, projection='3d')
     ax.plot_surface(W, B, L, cmap='viridis', alpha=0.8)
-    ax.set_xlabel('w', fontsize=12)
-    ax.set_ylabel('b', fontsize=12)
+    ax.set_xlabel(labels[0], fontsize=12)
+    ax.set_ylabel(labels[1], fontsize=12)
     ax.set_zlabel('Loss', fontsize=12)
     ax.set_title('Loss Landscape', fontsize=14, fontweight='bold')
     plt.tight_layout()
     plt.show()
 
 
-def plot_loss_contour(w_range=(-2, 2), b_range=(-2, 2), loss_fn=None, path=None):
+def plot_loss_contour(w_range=(-2, 2), b_range=(-2, 2), loss_fn=None, path=None,
+                      resolution=100, labels=('w', 'b')):
     """
     绘制损失等高线图
 
@@ -43,14 +122,10 @@ def plot_loss_contour(w_range=(-2, 2), b_range=(-2, 2), loss_fn=None, path=None)
         b_range: 偏置范围
         loss_fn: 损失函数
         path: 可选的优化路径 [(w0, b0), (w1, b1), ...]
+        resolution: 每个方向的网格点数
+        labels: 两个坐标轴的名字（如 landscape.LossLandscape 的 ('α', 'β')）
     """
-    if loss_fn is None:
-        loss_fn = lambda w, b: w**2 + b**2 + 0.5 * w * b
-
-    w = np.linspace(w_range[0], w_range[1], 100)
-    b = np.linspace(b_range[0], b_range[1], 100)
-    W, B = np.meshgrid(w, b)
-    L = np.vectorize(loss_fn)(W, B)
+    W, B, L = loss_surface(loss_fn, w_range, b_range, resolution)
 
     fig, ax = plt.subplots(figsize=(8, 6))
     contour = ax.contour(W, B, L, levels=20, cmap='viridis')
@@ -64,8 +139,8 @@ def plot_loss_contour(w_range=(-2, 2), b_range=(-2, 2), loss_fn=None, path=None)
         ax.plot(path[-1, 0], path[-1, 1], 'r*', markersize=15, label='End')
         ax.legend()
 
-    ax.set_xlabel('w', fontsize=12)
-    ax.set_ylabel('b', fontsize=12)
+    ax.set_xlabel(labels[0], fontsize=12)
+    ax.set_ylabel(labels[1], fontsize=12)
     ax.set_title('Loss Contour', fontsize=14, fontweight='bold')
     plt.tight_layout()
     plt.show()
@@ -169,7 +244,64 @@ def plot_loss_comparison():
     plt.show()
 
 
-def plot_learning_rate_effect(lrs=None):
-    """演示不同学习率的效果：太小 / 合适 / 太大"""
-    # TODO: 实现学习率效果对比图
-    raise NotImplementedError
+def plot_learning_rate_effect(lrs=None, epochs=300):
+    """
+    演示不同学习率的效果：太小 / 合适 / 太大
+
+    在一位数加法任务上（20 维 one-hot 输入 → 10 类），用 StackedNN 把
+    初始权重完全相同、只有学习率不同的几个网络一次性并排训练。
+
+    Args:
+        lrs: 学习率列表，默认 [0.01, 0.5, 10.0]
+        epochs: 训练轮数（全批量）
+    """
+    from stacked import StackedNN  # 课程目录下的训练引擎，用到时再导入
+
+    if lrs is None:
+        lrs = [0.01, 0.5, 10.0]
+    lrs = np.asarray(lrs, dtype=float)
+
+    # 所有 a + b < 10 的组合
+    pairs = [(a, b) for a in range(10) for b in range(10 - a)]
+    X = np.zeros((20, len(pairs)))
+    for i, (a, b) in enumerate(pairs):
+        X[a, i] = 1
+        X[10 + b, i] = 1
+    y = np.array([a + b for a, b in pairs])
+
+    models = StackedNN([20, 16, 16, 10], n_models=len(lrs), seeds=[0] * len(lrs))
+    losses = np.empty((epochs, len(lrs)))
+    for epoch in range(epochs):
+        models.forward(X)
+        losses[epoch] = models.loss(y)
+        models.backward(y)
+        models.update(lrs)
+    acc = np.mean(models.predict(X) == y, axis=1)
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    colors = plt.cm.viridis(np.linspace(0, 0.9, len(lrs)))
+
+    # 左图：损失曲线
+    for lr, loss, color in zip(lrs, losses.T, colors):
+        axes[0].plot(loss, color=color, linewidth=2, label=f'lr = {lr:g}')
+    axes[0].set_yscale('log')
+    axes[0].set_xlabel('Epoch', fontsize=12)
+    axes[0].set_ylabel('Loss (log scale)', fontsize=12)
+    axes[0].set_title('Training Loss', fontsize=14, fontweight='bold')
+    axes[0].legend()
+    axes[0].grid(True, alpha=0.3)
+
+    # 右图：最终准确率
+    labels = [f'{lr:g}' for lr in lrs]
+    axes[1].bar(labels, acc, color=colors)
+    for i, a in enumerate(acc):
+        axes[1].text(i, a + 0.02, f'{a:.0%}', ha='center', fontsize=11)
+    axes[1].set_xlabel('Learning Rate', fontsize=12)
+    axes[1].set_ylabel('Final Accuracy', fontsize=12)
+    axes[1].set_title(f'Accuracy after {epochs} Epochs', fontsize=14, fontweight='bold')
+    axes[1].set_ylim(0, 1.15)
+
+    fig.suptitle('Too small: slow  |  Just right: converges  |  Too large: unstable',
+                 fontsize=11, style='italic', y=0.02)
+    plt.tight_layout()
+    plt.show()
@@ -3,14 +3,19 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from .render import draw_network
 
-def plot_network(layers=None, ax=None):
+
+def plot_network(layers=None, ax=None, weights=None, max_edges=None):
     """
     绘制神经网络架构图
 
     Args:
         layers: 每层神经元数量列表，例如 [2, 4, 3, 1]
         ax: 可选 matplotlib axis
+        weights: 可选，各层权重矩阵列表（如 [model.params['W1'], ...]），配合 max_edges 使用
+        max_edges: 每对相邻层最多画多少条连接，大网络（如 784→128→10）建议设为几千；
+            有 weights 时保留绝对值最大的连接
     """
     if layers is None:
         layers = [2, 4, 3, 1]
@@ -19,25 +24,10 @@ def plot_network(layers=None, ax=None):
         fig, ax = plt.subplots(figsize=(10, 6))
 
     n_layers = len(layers)
-    max_neurons = max(layers)
-
-    # 绘制每一层的神经元
-    for i, n_neurons in enumerate(layers):
-        x = i / (n_layers - 1) if n_layers > 1 else 0.5
-        y_positions = np.linspace(0.1, 0.9, n_neurons) if n_neurons > 1 else [0.5]
-
-        for j, y in enumerate(y_positions):
-            circle = plt.Circle((x, y), 0.03, color='steelblue', ec='black', linewidth=1.5)
-            ax.add_patch(circle)
-
-            # 绘制连接线到下一层
-            if i < n_layers - 1:
-                next_n = layers[i + 1]
-                next_x = (i + 1) / (n_layers - 1)
-                next_y_positions = np.linspace(0.1, 0.9, next_n) if next_n > 1 else [0.5]
-                for next_y in next_y_positions:
-                    ax.plot([x + 0.03, next_x - 0.03], [y, next_y],
-                            color='gray', linewidth=0.5, alpha=0.5)
+    # 神经元很多时缩小半径、减细线条
+    radius = min(0.03, 0.4 / max(layers))
+    draw_network(ax, layers, radius=radius, node_lw=1.5 if radius >= 0.03 else 0.3,
+                 edge_lw=0.5 if max_edges is None else 0.3, weights=weights, max_edges=max_edges)
 
     # 添加层标签
     layer_names = ['Input'] + [f'Hidden {i}' for i in range(1, n_layers - 1)] + ['Output']
@@ -162,24 +152,7 @@ def plot_depth_vs_width():
     # 左图：浅而宽 [3, 16, 1]
     wide_layers = [3, 16, 1]
     ax = axes[0]
-    n_layers = len(wide_layers)
-    max_neurons = max(wide_layers)
-
-    for i, n_neurons in enumerate(wide_layers):
-        x = i / (n_layers - 1) if n_layers > 1 else 0.5
-        y_positions = np.linspace(0.1, 0.9, n_neurons) if n_neurons > 1 else [0.5]
-
-        for j, y in enumerate(y_positions):
-            circle = plt.Circle((x, y), 0.025, color='steelblue', ec='black', linewidth=1)
-            ax.add_patch(circle)
-
-            if i < n_layers - 1:
-                next_n = wide_layers[i + 1]
-                next_x = (i + 1) / (n_layers - 1)
-                next_y_positions = np.linspace(0.1, 0.9, next_n) if next_n > 1 else [0.5]
-                for next_y in next_y_positions:
-                    ax.plot([x + 0.025, next_x - 0.025], [y, next_y],
-                            color='gray', linewidth=0.3, alpha=0.5)
+    draw_network(ax, wide_layers, radius=0.025, node_lw=1, edge_lw=0.3)
 
     ax.set_xlim(-0.1, 1.1)
     ax.set_ylim(-0.1, 1.1)
@@ -192,23 +165,8 @@ def plot_depth_vs_width():
     # 右图：深而窄 [3, 4, 4, 4, 1]
     deep_layers = [3, 4, 4, 4, 1]
     ax = axes[1]
-    n_layers = len(deep_layers)
-
-    for i, n_neurons in enumerate(deep_layers):
-        x = i / (n_layers - 1) if n_layers > 1 else 0.5
-        y_positions = np.linspace(0.3, 0.7, n_neurons) if n_neurons > 1 else [0.5]
-
-        for j, y in enumerate(y_positions):
-            circle = plt.Circle((x, y), 0.025, color='coral', ec='black', linewidth=1)
-            ax.add_patch(circle)
-
-            if i < n_layers - 1:
-                next_n = deep_layers[i + 1]
-                next_x = (i + 1) / (n_layers - 1)
-                next_y_positions = np.linspace(0.3, 0.7, next_n) if next_n > 1 else [0.5]
-                for next_y in next_y_positions:
-                    ax.plot([x + 0.025, next_x - 0.025], [y, next_y],
-                            color='gray', linewidth=0.5, alpha=0.6)
+    draw_network(ax, deep_layers, y_range=(0.3, 0.7), radius=0.025, node_color='coral',
+                 node_lw=1, edge_alpha=0.6)
 
     ax.set_xlim(-0.1, 1.1)
     ax.set_ylim(-0.1, 1.1)
@@ -0,0 +1,122 @@
+"""网络结构图的公共绘制工具 / Shared helpers for drawing network diagrams
+
+连接线和神经元都用 matplotlib 的 Collection 批量绘制：
+每对相邻层的全部连接是一个 LineCollection，每层神经元是一个 EllipseCollection，
+坐标由 NumPy 一次算出。784 → 128 → 10 这样的网络也只需要几个 artist。
+"""
+
+import numpy as np
+from matplotlib.collections import EllipseCollection, LineCollection
+
+
+def layer_positions(layers, y_range=(0.1, 0.9), x_range=(0.0, 1.0)):
+    """
+    每层神经元的坐标
+
+    Args:
+        layers: 每层神经元数量
+        y_range: 神经元在纵向均匀分布的范围（只有一个神经元时放在中间）
+        x_range: 第一层和最后一层的横坐标
+    Returns:
+        [(n_i, 2) 数组, ...]
+    """
+    n_layers = len(layers)
+    xs = np.linspace(*x_range, n_layers) if n_layers > 1 else [np.mean(x_range)]
+    positions = []
+    for x, n in zip(xs, layers):
+        ys = np.linspace(*y_range, n) if n > 1 else np.array([np.mean(y_range)])
+        positions.append(np.column_stack([np.full(n, x), ys]))
+    return positions
+
+
+def select_edges(n_edges, weights=None, max_edges=None):
+    """
+    选出要画的连接（按 (目标, 源) 展平后的下标）
+
+    Args:
+        n_edges: 连接总数
+        weights: 与连接一一对应的权重，给定时保留绝对值最大的 max_edges 条
+        max_edges: 最多画多少条；None 表示全部。没有权重时均匀抽取
+    """
+    if max_edges is None or n_edges <= max_edges:
+        return np.arange(n_edges)
+    if weights is not None:
+        idx = np.argpartition(np.abs(np.ravel(weights)), n_edges - max_edges)[n_edges - max_edges:]
+        return np.sort(idx)
+    return np.linspace(0, n_edges - 1, max_edges).astype(int)
+
+
+def draw_edges(ax, src, dst, shrink=0.0, weights=None, max_edges=None, keep=None, **kwargs):
+    """
+    画两层之间的全连接，返回一个 LineCollection
+
+    Args:
+        ax: matplotlib axis
+        src, dst: 两层神经元坐标 (n_src, 2), (n_dst, 2)
+        shrink: 线段两端向内缩进的横向距离（通常是神经元半径）
+        weights: (n_dst, n_src) 权重矩阵，与 W{l} 形状一致，用于按大小抽取连接
+        max_edges: 最多画多少条连接
+        keep: (n_dst, n_src) 布尔矩阵，只画为 True 的连接
+        **kwargs: 传给 LineCollection，如 colors, linewidths, alpha, linestyles, zorder
+    """
+    n_src, n_dst = len(src), len(dst)
+    segments = np.empty((n_dst, n_src, 2, 2))
+    segments[:, :, 0, :] = src[None, :, :]
+    segments[:, :, 1, :] = dst[:, None, :]
+    segments[:, :, 0, 0] += shrink
+    segments[:, :, 1, 0] -= shrink
+    segments = segments.reshape(-1, 2, 2)
+
+    if keep is not None:
+        flat_keep = np.ravel(keep)
+        segments = segments[flat_keep]
+        if weights is not None:
+            weights = np.ravel(weights)[flat_keep]
+    idx = select_edges(len(segments), weights, max_edges)
+
+    kwargs.setdefault('zorder', 1)
+    lines = LineCollection(segments[idx], **kwargs)
+    ax.add_collection(lines)
+    return lines
+
+
+def draw_neurons(ax, pos, radius, **kwargs):
+    """
+    画一层神经元（数据坐标下半径为 radius 的圆），返回一个 EllipseCollection
+
+    Args:
+        ax: matplotlib axis
+        pos: (n, 2) 神经元坐标
+        radius: 半径（数据单位）
+        **kwargs: 传给 EllipseCollection，如 facecolors, edgecolors, linewidths, linestyles
+    """
+    d = np.full(len(pos), 2 * radius)
+    kwargs.setdefault('zorder', 2)
+    circles = EllipseCollection(d, d, np.zeros(len(pos)), units='xy', offsets=pos,
+                                offset_transform=ax.transData, **kwargs)
+    ax.add_collection(circles)
+    return circles
+
+
+def draw_network(ax, layers, y_range=(0.1, 0.9), radius=0.03, node_color='steelblue',
+                 node_edge='black', node_lw=1.5, edge_color='gray', edge_lw=0.5, edge_alpha=0.5,
+                 weights=None, max_edges=None):
+    """
+    画一个全连接网络：每对相邻层一个 LineCollection，每层一个 EllipseCollection
+
+    Args:
+        layers: 每层神经元数量
+        weights: 可选，每对相邻层的 (n_{l}, n_{l-1}) 权重矩阵列表（如 model.params['W1'], ...）
+        max_edges: 每对相邻层最多画多少条连接；有 weights 时保留绝对值最大的
+    Returns:
+        每层神经元坐标的列表
+    """
+    positions = layer_positions(layers, y_range)
+    for i in range(len(layers) - 1):
+        draw_edges(ax, positions[i], positions[i + 1], shrink=radius,
+                   weights=None if weights is None else weights[i], max_edges=max_edges,
+                   colors=edge_color, linewidths=edge_lw, alpha=edge_alpha)
+    for pos in positions:
+        draw_neurons(ax, pos, radius, facecolors=node_color, edgecolors=node_edge,
+                     linewidths=node_lw)
+    return positions
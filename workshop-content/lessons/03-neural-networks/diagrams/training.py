@@ -6,6 +6,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from .render import draw_edges, draw_neurons, layer_positions
+
 
 # =============================================================================
 # 初始化 (Initialization)
@@ -49,10 +51,184 @@ def plot_init_distributions(methods=None):
     plt.show()
 
 
-def plot_activation_histograms(network, X, init_method='xavier'):
-    """绘制每层激活值分布直方图，诊断梯度消失/爆炸"""
-    # TODO: 实现逐层激活值分布图
-    raise NotImplementedError
+class StreamingHistogram:
+    """
+    固定分箱的流式直方图，同时累计均值和方差
+
+    每次 update 只用 np.bincount 把新数据折叠进计数，不保存原始数据；
+    均值 / 方差用 Chan 等人的并行合并公式逐块合并，数值上与一次算完相同。
+    """
+
+    def __init__(self, bins=60, range=None):
+        """
+        Args:
+            bins: 分箱数
+            range: (min, max)；None 表示由第一块数据的范围（两侧各留 25% 余量）决定。
+                超出范围的值计入 underflow / overflow
+        """
+        self.bins = bins
+        self.range = range
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def edges(self):
+        return np.linspace(*self.range, self.bins + 1)
+
+    @property
+    def var(self):
+        return self._m2 / self.n if self.n else 0.0
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def update(self, x):
+        x = np.ravel(x)
+        if x.size == 0:
+            return
+        if self.range is None:
+            lo, hi = float(x.min()), float(x.max())
+            pad = 0.25 * (hi - lo) or 1.0
+            self.range = (lo - pad if lo < 0 else lo, hi + pad)
+
+        # 分箱: 下标 0 和 bins+1 分别是下溢、上溢
+        lo, hi = self.range
+        idx = np.floor((x - lo) * (self.bins / (hi - lo)))
+        np.clip(idx, -1, self.bins, out=idx)
+        c = np.bincount(idx.astype(np.intp) + 1, minlength=self.bins + 2)
+        self.underflow += int(c[0])
+        self.counts += c[1:-1]
+        self.overflow += int(c[-1])
+
+        # 合并均值和二阶中心矩
+        n_b = x.size
+        mean_b = float(np.mean(x, dtype=np.float64))
+        m2_b = float(np.var(x, dtype=np.float64)) * n_b
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self._m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+
+
+class LayerStats:
+    """一层激活值的流式统计：直方图、均值方差、零值比例、死亡 ReLU 比例"""
+
+    def __init__(self, n_neurons, bins=60):
+        self.hist = StreamingHistogram(bins)
+        self.n_zero = 0
+        self.alive = np.zeros(n_neurons, dtype=bool)
+
+    def update(self, A):
+        """A: (n_neurons, m) 一块激活值"""
+        self.hist.update(A)
+        positive = A > 0
+        self.n_zero += A.size - int(np.count_nonzero(positive))
+        self.alive |= positive.any(axis=1)
+
+    @property
+    def zero_fraction(self):
+        """输出为 0 的激活所占比例"""
+        return self.n_zero / self.hist.n if self.hist.n else 0.0
+
+    @property
+    def dead_fraction(self):
+        """对所有样本输出都为 0 的神经元（死亡 ReLU）所占比例"""
+        return 1.0 - self.alive.mean()
+
+
+def activation_stats(network, X, chunk_size=4096, bins=60):
+    """
+    分块前向传播，逐层累计隐藏层激活值的统计量；内存只与 chunk_size 有关
+
+    Args:
+        network: 有 L、forward(X) 和 cache['A{l}'] 的网络（SimpleNN 或 notebook 中的 NeuralNetwork）
+        X: (features, m) 输入，可以是内存映射数组；整数输入（如 load_mnist 的 uint8 像素）
+            逐块归一化到 [0, 1]
+        chunk_size: 每块样本数
+    Returns:
+        {l: LayerStats}，l = 1 .. L-1
+    """
+    from dataset import normalize
+    dtype = getattr(network, 'dtype', np.float32)
+    stats = {}
+    for lo in range(0, X.shape[1], chunk_size):
+        chunk = X[:, lo:lo + chunk_size]
+        if np.issubdtype(chunk.dtype, np.integer):
+            chunk = normalize(chunk, dtype)
+        network.forward(chunk)
+        for l in range(1, network.L):
+            A = network.cache[f'A{l}']
+            if l not in stats:
+                stats[l] = LayerStats(A.shape[0], bins)
+            stats[l].update(A)
+    return stats
+
+
+def _init_std(method, fan_in, fan_out):
+    """与 plot_init_distributions 相同的初始化标准差"""
+    return {
+        'zero': 0.0,
+        'random': 1.0,
+        'xavier': np.sqrt(2.0 / (fan_in + fan_out)),
+        'he': np.sqrt(2.0 / fan_in),
+    }[method]
+
+
+def plot_activation_histograms(network, X, init_method='xavier', chunk_size=4096, bins=60):
+    """
+    绘制每层激活值分布直方图，诊断梯度消失/爆炸
+
+    Args:
+        network: 训练好的网络（SimpleNN 等，见 activation_stats），
+            或层数列表如 [784, 256, 256, 256, 256, 10]，此时用 init_method 初始化一个新的 ReLU 网络
+        X: (features, m) 输入；分块计算，60000 个 MNIST 样本也只占常数内存
+        init_method: network 为层数列表时使用的初始化方法 'zero' / 'random' / 'xavier' / 'he'
+    """
+    if isinstance(network, (list, tuple)):
+        from network import SimpleNN
+        layer_dims = list(network)
+        network = SimpleNN(layer_dims, dtype=X.dtype if X.dtype.kind == 'f' else np.float64)
+        for l in range(1, network.L + 1):
+            W = network.params[f'W{l}']
+            W[...] = np.random.randn(*W.shape) * _init_std(init_method, W.shape[1], W.shape[0])
+        title = f'Hidden Activations ({init_method.upper()} init)'
+    else:
+        title = 'Hidden Activations'
+
+    stats = activation_stats(network, X, chunk_size, bins)
+
+    n = len(stats)
+    fig, axes = plt.subplots(1, n, figsize=(3.5 * n, 3.5), squeeze=False)
+    for ax, (l, s) in zip(axes[0], stats.items()):
+        h = s.hist
+        edges = h.edges
+        ax.bar(edges[:-1], h.counts / h.n, width=np.diff(edges), align='edge',
+               color='steelblue', alpha=0.7)
+        ax.set_yscale('log')
+        ax.set_title(f'Layer {l}', fontsize=12, fontweight='bold')
+        ax.set_xlabel('Activation', fontsize=11)
+        # 分箱范围由第一块数据决定，之后落在范围外的值画不出来，在文字里给出比例
+        text = (f'mean={h.mean:.3g}\nstd={h.std:.3g}\nzeros={s.zero_fraction:.1%}\n'
+                f'dead={s.dead_fraction:.1%}')
+        if h.underflow:
+            text += f'\n< {edges[0]:.3g}: {h.underflow / h.n:.2%}'
+        if h.overflow:
+            text += f'\n> {edges[-1]:.3g}: {h.overflow / h.n:.2%}'
+        ax.text(0.97, 0.97, text,
+                transform=ax.transAxes, ha='right', va='top', fontsize=9,
+                bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+    axes[0, 0].set_ylabel('Fraction (log)', fontsize=11)
+
+    fig.suptitle(title, fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.show()
+    return stats
 
 
 # =============================================================================
@@ -235,47 +411,31 @@ def plot_dropout_network(drop_prob=0.5):
         ['Without Dropout (Inference)', f'With Dropout (Training, p={drop_prob})'],
         [False, True]
     )):
-        n_layers = len(layers)
-
-        # 决定哪些神经元被丢弃
-        dropped = {}
+        # 决定哪些神经元被丢弃（输入和输出层不丢弃）
+        dropped = [np.zeros(n, dtype=bool) for n in layers]
         if show_dropout:
-            for i, n in enumerate(layers[1:-1], start=1):  # 不丢弃输入和输出层
+            for i, n in enumerate(layers[1:-1], start=1):
                 dropped[i] = np.random.rand(n) < drop_prob
 
-        # 绘制神经元和连接
-        for i, n_neurons in enumerate(layers):
-            x = i / (n_layers - 1)
-            y_positions = np.linspace(0.15, 0.85, n_neurons)
-
-            for j, y in enumerate(y_positions):
-                # 判断是否被丢弃
-                is_dropped = show_dropout and i in dropped and dropped[i][j]
-
-                # 绘制连接到下一层
-                if i < n_layers - 1:
-                    next_n = layers[i + 1]
-                    next_x = (i + 1) / (n_layers - 1)
-                    next_y_positions = np.linspace(0.15, 0.85, next_n)
-
-                    for k, next_y in enumerate(next_y_positions):
-                        next_dropped = show_dropout and (i + 1) in dropped and dropped[i + 1][k]
-                        if is_dropped or next_dropped:
-                            # 被丢弃的连接用虚线
-                            ax.plot([x + 0.03, next_x - 0.03], [y, next_y],
-                                    color='lightgray', linewidth=0.5, linestyle=':', alpha=0.3)
-                        else:
-                            ax.plot([x + 0.03, next_x - 0.03], [y, next_y],
-                                    color='gray', linewidth=0.5, alpha=0.5)
-
-                # 绘制神经元
-                if is_dropped:
-                    circle = plt.Circle((x, y), 0.025, color='lightgray',
-                                         ec='gray', linewidth=1, linestyle='--')
-                    ax.text(x, y, '×', ha='center', va='center', fontsize=10, color='red')
-                else:
-                    circle = plt.Circle((x, y), 0.025, color='steelblue', ec='black', linewidth=1)
-                ax.add_patch(circle)
+        positions = layer_positions(layers, y_range=(0.15, 0.85))
+
+        # 连接：两端神经元都保留的画实线，其余（被丢弃的）画虚线
+        for i in range(len(layers) - 1):
+            cut = dropped[i + 1][:, None] | dropped[i][None, :]
+            draw_edges(ax, positions[i], positions[i + 1], shrink=0.03, keep=~cut,
+                       colors='gray', linewidths=0.5, alpha=0.5)
+            if cut.any():
+                draw_edges(ax, positions[i], positions[i + 1], shrink=0.03, keep=cut,
+                           colors='lightgray', linewidths=0.5, linestyles=':', alpha=0.3)
+
+        # 神经元
+        for pos, drop in zip(positions, dropped):
+            draw_neurons(ax, pos, 0.025,
+                         facecolors=np.where(drop, 'lightgray', 'steelblue'),
+                         edgecolors=np.where(drop, 'gray', 'black'),
+                         linewidths=1, linestyles=['--' if d else '-' for d in drop])
+            for x, y in pos[drop]:
+                ax.text(x, y, '×', ha='center', va='center', fontsize=10, color='red')
 
         ax.set_xlim(-0.1, 1.1)
         ax.set_ylim(0, 1)
@@ -299,10 +459,161 @@ def plot_l2_regularization_effect():
 # 优化器 (Optimizers)
 # =============================================================================
 
-def plot_optimizer_comparison(optimizers=None):
-    """对比不同优化器的收敛路径"""
-    # TODO: 实现优化器对比图
-    raise NotImplementedError
+# 二维解析曲面: 损失、梯度（对形状 (..., 2) 的参数数组逐点计算）、显示范围、最优点
+SURFACES = {
+    'quadratic': dict(
+        loss=lambda w1, w2: 0.1 * w1**2 + 2 * w2**2,  # 细长椭圆：w2 方向更陡（病态条件数）
+        grad=lambda w1, w2: (0.2 * w1, 4 * w2),
+        xlim=(-3, 3), ylim=(-2, 2), optimum=(0, 0), start=(2.5, 1.5),
+        lr={'sgd': 0.3, 'momentum': 0.3, 'rmsprop': 0.05, 'adam': 0.1},
+    ),
+    'rosenbrock': dict(
+        loss=lambda w1, w2: (1 - w1)**2 + 100 * (w2 - w1**2)**2,  # 弯曲的狭长山谷
+        grad=lambda w1, w2: (-2 * (1 - w1) - 400 * w1 * (w2 - w1**2), 200 * (w2 - w1**2)),
+        xlim=(-2, 2), ylim=(-1, 3), optimum=(1, 1), start=(-1.5, 2.0),
+        lr={'sgd': 1e-3, 'momentum': 5e-3, 'rmsprop': 1e-2, 'adam': 0.1},
+    ),
+    'saddle': dict(
+        loss=lambda w1, w2: w1**2 - w2**2,  # 鞍点：原点处梯度为 0 但不是最小值
+        grad=lambda w1, w2: (2 * w1, -2 * w2),
+        xlim=(-2, 2), ylim=(-2, 2), optimum=None, start=(-1.8, 0.01),
+        lr={'sgd': 0.05, 'momentum': 0.05, 'rmsprop': 0.02, 'adam': 0.05},
+    ),
+}
+
+# 每种优化器在统一更新公式中的默认超参数；与 optim.py 中的实现一致
+OPTIMIZER_DEFAULTS = {
+    'sgd': dict(beta1=0.0, beta2=0.0, adaptive=False, bias_correction=False),
+    'momentum': dict(beta1=0.9, beta2=0.0, adaptive=False, bias_correction=False),
+    'rmsprop': dict(beta1=0.0, beta2=0.9, adaptive=True, bias_correction=False),
+    'adam': dict(beta1=0.9, beta2=0.999, adaptive=True, bias_correction=True),
+}
+
+
+def _config_arrays(configs, surface):
+    """把配置列表整理成每行一个配置的超参数列向量"""
+    rows = []
+    for cfg in configs:
+        if isinstance(cfg, str):
+            cfg = {'optimizer': cfg}
+        name = cfg['optimizer']
+        row = dict(OPTIMIZER_DEFAULTS[name], lr=SURFACES[surface]['lr'][name], eps=1e-8)
+        row.update({k: v for k, v in cfg.items() if k != 'optimizer'})
+        rows.append(row)
+    return {key: np.array([row[key] for row in rows], dtype=float)[:, None, None]
+            for key in ('lr', 'beta1', 'beta2', 'adaptive', 'bias_correction', 'eps')}
+
+
+def simulate_optimizers(surface='quadratic', starts=None, configs=None, steps=50):
+    """
+    在解析曲面上同时模拟 (配置 × 起点) 条优化轨迹
+
+    所有优化器共用 Adam 形式的更新，靠每行的超参数区分:
+        m = β1·m + (1-β1)·g              (SGD: β1 = 0；Momentum: β1 = β)
+        v = β2·v + (1-β2)·g²             (只有 RMSProp / Adam 使用)
+        w = w - lr · m̂ / (√v̂ + ε)        (Adam 做偏差修正；SGD/Momentum 分母为 1)
+    每一步是对形状 (n_configs, n_starts, 2) 数组的几次运算，几百条轨迹与一条一样快。
+
+    Args:
+        surface: SURFACES 中的名字
+        starts: (n_starts, 2) 起点；None 表示曲面的默认起点
+        configs: 配置列表，每项为优化器名，或
+            {'optimizer': 'adam', 'lr': 0.1, 'beta1': 0.9, 'beta2': 0.999, 'eps': 1e-8} 这样的字典，
+            未给出的超参数取默认值（学习率默认值随曲面而定）
+        steps: 步数
+    Returns:
+        paths: (n_configs, n_starts, steps + 1, 2)
+    """
+    if starts is None:
+        starts = [SURFACES[surface]['start']]
+    if configs is None:
+        configs = list(OPTIMIZER_DEFAULTS)
+    grad_fn = SURFACES[surface]['grad']
+    h = _config_arrays(configs, surface)
+
+    starts = np.asarray(starts, dtype=float)
+    shape = (len(configs), len(starts), 2)
+    paths = np.empty((len(configs), len(starts), steps + 1, 2))
+    w = np.broadcast_to(starts, shape).copy()
+    m = np.zeros(shape)
+    v = np.zeros(shape)
+    paths[:, :, 0] = w
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        for t in range(1, steps + 1):
+            g = np.stack(grad_fn(w[..., 0], w[..., 1]), axis=-1)
+            m = h['beta1'] * m + (1 - h['beta1']) * g
+            v = h['beta2'] * v + (1 - h['beta2']) * g * g
+
+            m_hat = np.where(h['bias_correction'], m / (1 - h['beta1'] ** t), m)
+            v_hat = np.where(h['bias_correction'], v / (1 - h['beta2'] ** t), v)
+            denom = np.where(h['adaptive'], np.sqrt(v_hat) + h['eps'], 1.0)
+            w = w - h['lr'] * m_hat / denom
+            paths[:, :, t] = w
+    return paths
+
+
+def plot_optimizer_comparison(optimizers=None, surface='rosenbrock', starts=None, steps=500):
+    """
+    对比不同优化器的收敛路径
+
+    Args:
+        optimizers: 优化器名或配置字典的列表（见 simulate_optimizers），
+            默认 ['sgd', 'momentum', 'rmsprop', 'adam']
+        surface: 'quadratic' / 'rosenbrock' / 'saddle'
+        starts: (n_starts, 2) 起点；多个起点时每个优化器画多条路径
+        steps: 步数
+    """
+    if optimizers is None:
+        optimizers = list(OPTIMIZER_DEFAULTS)
+    spec = SURFACES[surface]
+    paths = simulate_optimizers(surface, starts, optimizers, steps)
+    names = [cfg if isinstance(cfg, str) else
+             ', '.join(f'{k}={v}' for k, v in cfg.items()) for cfg in optimizers]
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5.5))
+
+    # 左图：等高线 + 轨迹
+    ax = axes[0]
+    W1, W2 = np.meshgrid(np.linspace(*spec['xlim'], 200), np.linspace(*spec['ylim'], 200))
+    Z = spec['loss'](W1, W2)
+    if surface == 'rosenbrock':
+        ax.contour(W1, W2, Z, levels=np.logspace(-1, 3.5, 20), cmap='Blues', alpha=0.7)
+    else:
+        ax.contour(W1, W2, Z, levels=20, cmap='Blues', alpha=0.7)
+
+    colors = plt.cm.tab10(np.arange(len(optimizers)) % 10)
+    for path, name, color in zip(paths, names, colors):
+        for k, p in enumerate(path):
+            ax.plot(p[:, 0], p[:, 1], '-', color=color, linewidth=1.5, alpha=0.9,
+                    label=name if k == 0 else None)
+    ax.plot(paths[0, :, 0, 0], paths[0, :, 0, 1], 'go', markersize=8, label='Start')
+    if spec['optimum'] is not None:
+        ax.plot(*spec['optimum'], 'g*', markersize=15, label='Optimum')
+    ax.set_xlim(spec['xlim'])
+    ax.set_ylim(spec['ylim'])
+    ax.set_xlabel('$w_1$', fontsize=12)
+    ax.set_ylabel('$w_2$', fontsize=12)
+    ax.set_title(f'Optimizer Paths ({surface})', fontsize=12, fontweight='bold')
+    ax.legend(loc='upper right', fontsize=9)
+
+    # 右图：损失随步数变化（多个起点取平均）
+    ax = axes[1]
+    with np.errstate(over='ignore', invalid='ignore'):
+        losses = spec['loss'](paths[..., 0], paths[..., 1]).mean(axis=1)
+    for loss, name, color in zip(losses, names, colors):
+        ax.plot(loss, color=color, linewidth=1.5, label=name)
+    if surface != 'saddle':
+        ax.set_yscale('log')
+    ax.set_xlabel('Step', fontsize=12)
+    ax.set_ylabel('Loss', fontsize=12)
+    ax.set_title('Loss vs Step', fontsize=12, fontweight='bold')
+    ax.grid(alpha=0.3)
+    ax.legend(fontsize=9)
+
+    plt.tight_layout()
+    plt.show()
+    return paths
 
 
 def plot_momentum_visualization():
@@ -314,44 +625,24 @@ def plot_momentum_visualization():
     np.random.seed(42)
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
 
-    # 创建一个细长的椭圆形损失曲面（模拟病态条件数）
-    def loss_fn(w1, w2):
-        return 0.1 * w1**2 + 2 * w2**2  # 椭圆形：w2 方向更陡
-
-    # 生成等高线数据
+    # 细长的椭圆形损失曲面（模拟病态条件数）
+    spec = SURFACES['quadratic']
     w1_range = np.linspace(-3, 3, 100)
     w2_range = np.linspace(-2, 2, 100)
     W1, W2 = np.meshgrid(w1_range, w2_range)
-    Z = loss_fn(W1, W2)
-
-    # SGD 路径（无动量）
-    def sgd_path(start, lr=0.1, steps=30):
-        path = [start]
-        w = np.array(start, dtype=float)
-        for _ in range(steps):
-            grad = np.array([0.2 * w[0], 4 * w[1]])  # 梯度
-            w = w - lr * grad
-            path.append(w.copy())
-        return np.array(path)
-
-    # SGD + Momentum 路径
-    def momentum_path(start, lr=0.1, beta=0.9, steps=30):
-        path = [start]
-        w = np.array(start, dtype=float)
-        v = np.zeros(2)  # 速度
-        for _ in range(steps):
-            grad = np.array([0.2 * w[0], 4 * w[1]])
-            v = beta * v + (1 - beta) * grad  # 更新速度
-            w = w - lr * v
-            path.append(w.copy())
-        return np.array(path)
-
-    start = np.array([2.5, 1.5])
+    Z = spec['loss'](W1, W2)
+
+    # 两条路径一起模拟: SGD 与 SGD + Momentum（动量 v = βv + (1-β)∇L）
+    start = np.array(spec['start'])
+    paths = simulate_optimizers('quadratic', starts=[start], steps=25, configs=[
+        {'optimizer': 'sgd', 'lr': 0.3},
+        {'optimizer': 'momentum', 'lr': 0.3, 'beta1': 0.9},
+    ])
+    path_sgd, path_mom = paths[:, 0]
 
     # 左图：SGD
     ax = axes[0]
     ax.contour(W1, W2, Z, levels=15, cmap='Blues', alpha=0.7)
-    path_sgd = sgd_path(start, lr=0.3, steps=25)
     ax.plot(path_sgd[:, 0], path_sgd[:, 1], 'ro-', markersize=4, linewidth=1.5, label='SGD path')
     ax.plot(start[0], start[1], 'go', markersize=10, label='Start')
     ax.plot(0, 0, 'g*', markersize=15, label='Optimum')
@@ -366,7 +657,6 @@ def plot_momentum_visualization():
     # 右图：SGD + Momentum
     ax = axes[1]
     ax.contour(W1, W2, Z, levels=15, cmap='Blues', alpha=0.7)
-    path_mom = momentum_path(start, lr=0.3, beta=0.9, steps=25)
     ax.plot(path_mom[:, 0], path_mom[:, 1], 'ro-', markersize=4, linewidth=1.5, label='Momentum path')
     ax.plot(start[0], start[1], 'go', markersize=10, label='Start')
     ax.plot(0, 0, 'g*', markersize=15, label='Optimum')
@@ -0,0 +1,112 @@
+"""真实网络的损失曲面：在参数空间中沿两个随机方向切一个二维截面
+
+    L(α, β) = loss(θ + α·d1 + β·d2)
+
+θ 是训练好的参数，d1、d2 是按“滤波器归一化”缩放的随机方向
+（Li et al., 2018, Visualizing the Loss Landscape of Neural Nets）：
+权重矩阵的每一行（一个神经元的输入权重）缩放到与 θ 中对应行同样的范数，偏置方向置零。
+这样不同层、不同尺度的网络画出来的曲面可以相互比较。
+
+网格上的点按批交给 StackedNN，一次批量矩阵乘法同时算 K 个扰动后的模型。
+
+用法:
+    surface = LossLandscape(model, X_test, y_test, seed=0)
+    plot_loss_contour((-1, 1), (-1, 1), loss_fn=surface, resolution=41, labels=('α', 'β'))
+    plot_loss_landscape((-1, 1), (-1, 1), loss_fn=surface, resolution=41, labels=('α', 'β'))
+"""
+
+import numpy as np
+
+from dataset import normalize
+from stacked import StackedNN
+
+
+def filter_normalized_direction(model, rng):
+    """
+    一个与 model.flat_params 同形状的随机方向
+
+    参数:
+        model: SimpleNN 实例
+        rng: np.random.Generator
+    返回:
+        一维数组；权重部分按行缩放到与对应参数行相同的范数，偏置部分为 0
+    """
+    d = np.zeros_like(model.flat_params)
+    dirs = model.views(d)
+    for l in range(1, model.L + 1):
+        W = model.params[f'W{l}']
+        D = dirs[f'W{l}']
+        D[...] = rng.standard_normal(W.shape)
+        D *= (np.linalg.norm(W, axis=1, keepdims=True)
+              / (np.linalg.norm(D, axis=1, keepdims=True) + 1e-10))
+    return d
+
+
+class LossLandscape:
+    """
+    可以直接当 loss_fn 传给 plot_loss_landscape / plot_loss_contour 的真实损失曲面
+
+    实例可哈希且调用结果只取决于构造参数，所以同一个实例反复绘制时会命中曲面缓存。
+    """
+
+    def __init__(self, model, X, Y, seed=None, n_models=32, directions=None):
+        """
+        参数:
+            model: 训练好的 SimpleNN（参数会被复制，不受之后训练的影响）
+            X, Y: 计算损失用的数据 (features, m) 和整数标签 (m,) 或 one-hot；
+                整数输入（如 load_mnist 的 uint8 像素）先归一化到 [0, 1]
+            seed: 生成随机方向的种子
+            n_models: 每批同时计算多少个网格点；越大越快，内存约为
+                n_models × 隐藏层宽度 × m × 每个数的字节数
+            directions: 可选，自己指定的两个方向 (d1, d2)
+        """
+        self.center = model.flat_params.copy()
+        X = np.asarray(X)
+        self.X = (normalize(X, model.dtype) if np.issubdtype(X.dtype, np.integer)
+                  else X.astype(model.dtype))
+        self.Y = Y
+        if directions is None:
+            rng = np.random.default_rng(seed)
+            directions = [filter_normalized_direction(model, rng) for _ in range(2)]
+        self.directions = np.stack(directions)
+
+        # 参数马上会被覆盖，不做随机初始化（也就不影响调用方的全局随机数）
+        self._stack = StackedNN(model.layer_dims, n_models, dtype=model.dtype, init=False)
+
+    def __call__(self, alpha, beta):
+        """
+        在 (alpha, beta) 处的损失；两者可以是同形状的数组
+
+        返回:
+            与 alpha 同形状的 float64 数组
+        """
+        alpha, beta = np.broadcast_arrays(np.asarray(alpha, dtype=float),
+                                          np.asarray(beta, dtype=float))
+        coords = np.stack([alpha.ravel(), beta.ravel()], axis=1)
+        out = np.empty(len(coords))
+
+        stack = self._stack
+        K = stack.K
+        for lo in range(0, len(coords), K):
+            c = coords[lo:lo + K]
+            k = len(c)
+            # θ + α·d1 + β·d2，k 组参数一次算出
+            np.matmul(c, self.directions, out=stack.flat_params[:k])
+            stack.flat_params[:k] += self.center
+            stack.flat_params[k:] = self.center
+            stack.forward(self.X)
+            out[lo:lo + k] = stack.loss(self.Y)[:k]
+        return out.reshape(alpha.shape)
+
+    def project(self, flat_params):
+        """
+        把其它参数向量（如训练过程中保存的快照）投影到这个平面上
+
+        参数:
+            flat_params: (P,) 或 (n, P) 数组
+        返回:
+            (n, 2) 的 (α, β) 坐标，可作为 plot_loss_contour 的 path
+        """
+        delta = np.atleast_2d(flat_params) - self.center
+        coef, *_ = np.linalg.lstsq(self.directions.T, delta.T, rcond=None)
+        return coef.T
@@ -0,0 +1,280 @@
+"""后台预取 mini-batch：网络在第 k 批上训练时，第 k+1 批已经在准备
+
+准备一批数据（gather、归一化、数据增强）和训练是串行的，这段时间 CPU 上的计算就停了。
+PrefetchLoader 把准备工作挪到后台：
+    - 默认一个后台线程，通过有界队列交给训练循环；gather 和归一化都在 numpy 里释放 GIL
+    - workers > 0 时改用工作进程，适合随机平移这样 CPU 密集的 Python/numpy 增强；
+      批次直接写进共享内存，进程间只传递 (缓冲区编号, 下标, 种子)
+两种模式下缓冲区都是预先分配、循环使用的一组（ring buffer），不会每批分配。
+
+用法:
+    batches = BatchIterator(X_train, y_train, batch_size=128)
+    for X_batch, y_batch in PrefetchLoader(batches):                 # 一个 epoch
+        ...
+    with PrefetchLoader(batches, augment=random_shift, workers=3) as loader:
+        for epoch in range(epochs):
+            for X_batch, y_batch in loader:
+                ...
+
+注意: 产出的批次是环形缓冲区的视图，取下一批之后就可能被覆盖；需要保留时请 .copy()。
+增强函数在工作进程中调用，需要是模块级函数（或 functools.partial）。
+用户容器 cpu_limit = 4：训练本身用一个，workers 一般取 2~3。
+"""
+
+import collections
+import multiprocessing as mp
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from dataset import BatchIterator
+from parallel import attach_shared_memory
+
+
+def random_shift(X, rng, max_shift=2, image_shape=(28, 28)):
+    """
+    数据增强：每张图随机平移至多 max_shift 像素，移出去的部分补 0
+
+    参数:
+        X: (n, features) 按样本存放的一批图像（BatchIterator.gather 的结果）
+        rng: np.random.Generator
+        max_shift: 每个方向最大平移像素数
+        image_shape: 单张图像的 (高, 宽)
+    返回:
+        平移后的 (n, features) 新数组
+    """
+    n = len(X)
+    h, w = image_shape
+    s = max_shift
+    padded = np.zeros((n, h + 2 * s, w + 2 * s), dtype=X.dtype)
+    padded[:, s:s + h, s:s + w] = X.reshape(n, h, w)
+    dy, dx = rng.integers(-s, s + 1, size=(2, n))
+    rows = (np.arange(h) + s - dy[:, None])[:, :, None]
+    cols = (np.arange(w) + s - dx[:, None])[:, None, :]
+    return padded[np.arange(n)[:, None, None], rows, cols].reshape(n, -1)
+
+
+def _prepare(batches, idx, buffers, augment, seed):
+    """gather 一批并做增强，结果留在 buffers 里；返回样本数"""
+    X, _ = batches.gather(idx, buffers)
+    if augment is not None:
+        X[...] = augment(X, np.random.default_rng(seed))
+    return len(idx)
+
+
+def _memmap_source(data):
+    """data 恰好是一个完整的只读映射文件时，返回重新打开它所需的信息"""
+    base = data
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    if base is None or getattr(base, 'filename', None) is None:
+        return None
+    same = (base.shape == data.shape and data.flags.c_contiguous
+            and base.__array_interface__['data'][0] == data.__array_interface__['data'][0])
+    return (base.filename, base.offset) if same else None
+
+
+def _slot_arrays(shms, n_slots, batch_size, features, n_classes, one_hot, dtype, label_dtype):
+    """在共享内存块上建立环形缓冲区: X (n_slots, batch, features), Y"""
+    X = np.ndarray((n_slots, batch_size, features), dtype=dtype, buffer=shms['X'].buf)
+    if one_hot:
+        Y = np.ndarray((n_slots, n_classes, batch_size), dtype=dtype, buffer=shms['Y'].buf)
+    else:
+        Y = np.ndarray((n_slots, batch_size), dtype=label_dtype, buffer=shms['Y'].buf)
+    return X, Y
+
+
+def _worker(conn, names, source, data_shape, data_dtype, labels, options, n_slots, augment):
+    """工作进程：把主进程指定的批次 gather、增强后写进共享的第 slot 个缓冲区"""
+    shms = {key: attach_shared_memory(name) for key, name in names.items()}
+    if source is None:
+        data = np.ndarray(data_shape, dtype=data_dtype, buffer=shms['data'].buf)
+    else:
+        filename, offset = source
+        data = np.memmap(filename, dtype=data_dtype, mode='r', offset=offset, shape=data_shape)
+    batches = BatchIterator(data.T, labels, shuffle=False, **options)
+    X, Y = _slot_arrays(shms, n_slots, batches.batch_size, data_shape[1], batches.n_classes,
+                        batches.one_hot, batches.dtype, batches.labels.dtype)
+
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        slot, idx, seed = msg
+        try:
+            conn.send(_prepare(batches, idx, (X[slot], Y[slot]), augment, seed))
+        except Exception as e:
+            conn.send(e)
+
+    del batches, data, X, Y
+    for shm in shms.values():
+        shm.close()
+    conn.close()
+
+
+class PrefetchLoader:
+    """在后台准备下一批数据的 BatchIterator 包装"""
+
+    def __init__(self, batches, prefetch=2, augment=None, workers=0, seed=None):
+        """
+        参数:
+            batches: BatchIterator；打乱顺序仍由它决定（全局随机数），所以结果可复现
+            prefetch: 最多提前准备好多少批（队列长度）
+            augment: 可选的增强函数 augment(X, rng) -> X，X 为 (n, features) 按样本存放
+            workers: 0 表示用一个后台线程；> 0 表示用这么多个工作进程
+            seed: 增强用随机数的种子；每批从中派生一个种子，与线程/进程的调度无关
+        """
+        self.batches = batches
+        self.prefetch = max(prefetch, workers, 1)
+        self.augment = augment
+        self.workers = workers
+        self._rng = np.random.default_rng(seed)
+        self._procs = []
+        if workers:
+            self._start_workers()
+        else:
+            # 队列里 prefetch 批 + 训练正在用的 1 批 + 后台正在写的 1 批
+            self._slots = [batches.new_buffers() for _ in range(self.prefetch + 2)]
+
+    def __len__(self):
+        return len(self.batches)
+
+    def _start_workers(self):
+        b = self.batches
+        m, features = b.data.shape
+        # 正在路上的 prefetch 批 + 训练正在用的 1 批
+        n_slots = self.prefetch + 1
+        X, Y = b.new_buffers()
+        sizes = {'X': n_slots * X.nbytes, 'Y': n_slots * Y.nbytes}
+
+        # 内存映射的数据由各进程自己重新映射（共享页缓存）；其它数据复制一份到共享内存
+        source = _memmap_source(b.data)
+        if source is None:
+            sizes['data'] = b.data.nbytes
+        self._shms = {key: shared_memory.SharedMemory(create=True, size=size)
+                      for key, size in sizes.items()}
+        if source is None:
+            np.ndarray(b.data.shape, dtype=b.data.dtype, buffer=self._shms['data'].buf)[...] = b.data
+        X, Y = _slot_arrays(self._shms, n_slots, b.batch_size, features, b.n_classes,
+                            b.one_hot, b.dtype, b.labels.dtype)
+        self._slots = list(zip(X, Y))
+
+        names = {key: shm.name for key, shm in self._shms.items()}
+        options = dict(batch_size=b.batch_size, one_hot=b.one_hot, n_classes=b.n_classes,
+                       dtype=b.dtype)
+        self._conns = []
+        for _ in range(self.workers):
+            parent, child = mp.Pipe()
+            proc = mp.Process(target=_worker, daemon=True,
+                              args=(child, names, source, b.data.shape, b.data.dtype,
+                                    b.labels, options, n_slots, self.augment))
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def __iter__(self):
+        """一个 epoch；在训练循环所在的线程里决定顺序和每批的增强种子"""
+        order = self.batches.epoch()
+        seeds = self._rng.integers(2**63, size=len(order))
+        tasks = list(zip(order, seeds))
+        if self.workers:
+            return self._iter_workers(tasks)
+        return self._iter_thread(tasks)
+
+    def _iter_thread(self, tasks):
+        items = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def put(item):
+            # 训练循环提前退出时不能一直阻塞在满的队列上
+            while not stop.is_set():
+                try:
+                    items.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for k, (idx, seed) in enumerate(tasks):
+                    slot = self._slots[k % len(self._slots)]
+                    n = _prepare(self.batches, idx, slot, self.augment, seed)
+                    if not put((slot, n)):
+                        return
+            except Exception as e:
+                put(e)
+                return
+            put(None)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = items.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                (X, Y), n = item
+                yield X[:n].T, Y[..., :n]
+        finally:
+            stop.set()
+            thread.join()
+
+    def _iter_workers(self, tasks):
+        if not self._procs:
+            raise RuntimeError("PrefetchLoader is closed")
+        pending = collections.deque()
+
+        def submit(k):
+            idx, seed = tasks[k]
+            conn = self._conns[k % self.workers]
+            conn.send((k % len(self._slots), idx, seed))
+            pending.append((k, conn))
+
+        submitted = min(self.prefetch, len(tasks))
+        for k in range(submitted):
+            submit(k)
+        try:
+            while pending:
+                k, conn = pending.popleft()
+                n = conn.recv()
+                if isinstance(n, Exception):
+                    raise n
+                X, Y = self._slots[k % len(self._slots)]
+                yield X[:n].T, Y[..., :n]
+                # 上一批已经用完，它之前那个缓冲区可以交给下一个任务
+                if submitted < len(tasks):
+                    submit(submitted)
+                    submitted += 1
+        finally:
+            # 提前退出时收回还在路上的结果，保持管道同步
+            for _, conn in pending:
+                conn.recv()
+
+    def close(self):
+        """停止工作进程并释放共享内存（线程模式下无事可做）"""
+        if not self._procs:
+            return
+        for conn in self._conns:
+            conn.send(None)
+        for proc in self._procs:
+            proc.join()
+        for conn in self._conns:
+            conn.close()
+        self._procs = []
+
+        del self._slots
+        for shm in self._shms.values():
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
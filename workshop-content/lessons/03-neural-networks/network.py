@@ -1,126 +1,686 @@
 """简单的全连接神经网络实现"""
 
+import contextlib
+import itertools
+import json
+import os
+
 import numpy as np
 
+from profiling import Profile, timed
+
+
+# 预训练模型目录：pre_spawn_hook 把 workshop-content 只读挂载到 /opt/workshop，
+# 所有用户容器映射同一批文件，共享宿主机的页缓存
+MODEL_DIR = os.environ.get('WORKSHOP_MODELS', '/opt/workshop/models')
+
+
+def _matmul_cost(a, b, out):
+    return 2 * out.size * a.shape[-1], a.nbytes + b.nbytes + out.nbytes
+
+
+def _elementwise_cost(Z):
+    return Z.size, 2 * Z.nbytes
+
+
+# profile() 统计用：每个 (阶段, 操作) 的 (FLOPs, 读写字节数)，参数是 _timed 传入的数组
+_COSTS = {
+    ('forward', 'workspace'): lambda: (0, 0),
+    ('forward', 'gather'): lambda idx, Z: (Z.size * (len(idx) - 1),
+                                           len(idx) * Z.nbytes + idx.nbytes + Z.nbytes),
+    ('forward', 'matmul'): _matmul_cost,
+    ('forward', 'bias'): _elementwise_cost,
+    ('forward', 'relu'): _elementwise_cost,
+    ('forward', 'softmax'): lambda Z: (5 * Z.size + 2 * Z.shape[1], 5 * Z.nbytes),
+    ('backward', 'softmax'): _elementwise_cost,
+    ('backward', 'matmul'): _matmul_cost,
+    ('backward', 'relu'): lambda dA, mask: (2 * dA.size, 3 * dA.nbytes + 2 * mask.nbytes),
+    ('backward', 'scatter'): lambda dZ, idx, dW, cleared: (
+        dZ.size * (len(idx) + 1), 3 * len(idx) * dZ.nbytes + 3 * cleared * dW.itemsize),
+    ('backward', 'bias'): lambda dZ: (dZ.size, dZ.nbytes),
+    ('update', 'sgd'): lambda p, skipped=0: (2 * (p.size - skipped),
+                                             4 * (p.size - skipped) * p.itemsize),
+}
+
+
+class Workspace:
+    """固定批量大小的预分配缓冲区，forward/backward 在其中原地计算"""
+
+    def __init__(self, layer_dims, batch_size, dtype=np.float64):
+        """
+        参数:
+            layer_dims: 每层神经元数量
+            batch_size: 每批样本数 m
+            dtype: 缓冲区数据类型
+        """
+        self.batch_size = batch_size
+        L = len(layer_dims) - 1
+
+        # 前向: Z, A；反向: dZ 以及 ReLU 掩码
+        self.cache = {}
+        self.dZ = {}
+        self.mask = {}
+        for l in range(1, L + 1):
+            shape = (layer_dims[l], batch_size)
+            self.cache[f'Z{l}'] = np.empty(shape, dtype=dtype)
+            self.cache[f'A{l}'] = np.empty(shape, dtype=dtype)
+            self.dZ[l] = np.empty(shape, dtype=dtype)
+            if l < L:
+                self.mask[l] = np.empty(shape, dtype=bool)
+
+        # softmax 按列归约用的 (1, m) 行向量；lse 保存每列的 log-sum-exp
+        self.col = np.empty((1, batch_size), dtype=dtype)
+        self.lse = np.empty((1, batch_size), dtype=dtype)
+        self.cols = np.arange(batch_size)
+
+        # update() 的 lr * grads
+        self.step = np.empty(param_layout(layer_dims)[1], dtype=dtype)
+
+
+def param_layout(layer_dims):
+    """
+    参数在一维扁平缓冲区中的布局
+
+    先依次放所有权重 W1..WL，再放所有偏置 b1..bL，
+    这样全部权重是缓冲区开头连续的一段（方便只对权重做衰减）。
+
+    返回:
+        [(name, shape, offset), ...] 以及参数总数
+    """
+    L = len(layer_dims) - 1
+    shapes = [(f'W{l}', (layer_dims[l], layer_dims[l-1])) for l in range(1, L + 1)]
+    shapes += [(f'b{l}', (layer_dims[l], 1)) for l in range(1, L + 1)]
+    layout = []
+    offset = 0
+    for name, shape in shapes:
+        layout.append((name, shape, offset))
+        offset += shape[0] * shape[1]
+    return layout, offset
+
 
 class SimpleNN:
-    """简单的全连接神经网络"""
+    """
+    简单的全连接神经网络
+
+    所有参数存放在一个连续的一维数组 self.flat_params 中，所有梯度存放在
+    self.flat_grads 中；self.params / self.grads 里的 W{l}、b{l} 都是它们的视图。
+    因此更新参数是一次向量运算，保存检查点是一次数组写入，多进程之间
+    归约梯度也只需一次调用。请原地修改参数（如 params['W1'][...] = ...），
+    不要给字典重新赋值，否则会和扁平缓冲区脱节。
+    """
 
-    def __init__(self, layer_dims):
+    def __init__(self, layer_dims, dtype=np.float64, init=True):
         """
         参数:
             layer_dims: 每层神经元数量，如 [2, 16, 16, 19]
+            dtype: 参数、激活值和梯度的数据类型；np.float32 可减半内存带宽，
+                只有损失在 float64 中累加
+            init: 是否随机初始化权重；False 时参数全为 0、不消耗全局随机数
+                （参数马上会被覆盖时使用，如 copy / load）
         """
         self.layer_dims = layer_dims
-        self.params = {}
+        self.dtype = np.dtype(dtype)
         self.L = len(layer_dims) - 1
+        self.workspace = None
+        self._ws = None
+        self._index_input = False
+        # dW1 中可能非零的列（索引输入时只有用到的特征）；None 表示整个 dW1 都可能非零
+        self._grad_cols = np.empty(0, dtype=np.intp)
+        self.stats = None
 
-        # He 初始化
-        for l in range(1, self.L + 1):
-            self.params[f'W{l}'] = np.random.randn(
-                layer_dims[l], layer_dims[l-1]
-            ) * np.sqrt(2.0 / layer_dims[l-1])
-            self.params[f'b{l}'] = np.zeros((layer_dims[l], 1))
+        self.layout, size = param_layout(layer_dims)
+        self.n_weights = self.layout[self.L][2]
+        self.flat_params = np.zeros(size, dtype=self.dtype)
+        self.flat_grads = np.zeros(size, dtype=self.dtype)
+        self.params = self.views(self.flat_params)
+        self.grads = self.views(self.flat_grads, prefix='d')
+
+        # He 初始化（先按 float64 采样，保证同一随机种子下结果一致）
+        if init:
+            for l in range(1, self.L + 1):
+                self.params[f'W{l}'][...] = np.random.randn(
+                    layer_dims[l], layer_dims[l-1]
+                ) * np.sqrt(2.0 / layer_dims[l-1])
+
+    def views(self, flat, prefix=''):
+        """把一维缓冲区切成按层命名的矩阵视图，如 {'W1': ..., 'b1': ...}"""
+        return {prefix + name: flat[offset:offset + shape[0] * shape[1]].reshape(shape)
+                for name, shape, offset in self.layout}
+
+    def use_buffers(self, flat_params=None, flat_grads=None, copy=True):
+        """
+        让参数 / 梯度改用外部提供的一维缓冲区（如共享内存、内存映射文件）
+
+        参数:
+            flat_params, flat_grads: 长度为 param_count() 的一维数组；None 表示不变
+            copy: 是否把当前参数值复制进新的参数缓冲区
+        """
+        if flat_params is not None:
+            if copy:
+                flat_params[...] = self.flat_params
+            self.flat_params = flat_params
+            self.params = self.views(flat_params)
+        if flat_grads is not None:
+            self.flat_grads = flat_grads
+            self.grads = self.views(flat_grads, prefix='d')
+            self._grad_cols = None
+        return self
 
     def relu(self, z):
         return np.maximum(0, z)
 
     def relu_deriv(self, z):
-        return (z > 0).astype(float)
+        return (z > 0).astype(z.dtype)
 
     def softmax(self, z):
         exp_z = np.exp(z - np.max(z, axis=0, keepdims=True))
         return exp_z / np.sum(exp_z, axis=0, keepdims=True)
 
-    def forward(self, X):
-        """前向传播"""
-        self.cache = {'A0': X}
+    def logsumexp(self):
+        """最近一次 forward 输出层每列的 log(sum(exp(Z)))，形状 (1, m)"""
+        return self._ws.lse
+
+    def _as_input(self, X, indices=False):
+        """
+        整理输入
+
+        indices=False: 稠密输入 (features, m)，转为 self.dtype。
+        indices=True: 整数特征索引 (k, m)，第 j 个样本的输入是 X[:, j] 这 k 个位置
+        为 1 的稀疏向量（重复的索引会累加，即词袋计数）。
+        例如加法器的 20 维 one-hot 输入可以写成 [[a], [b + 10]]。
+        """
+        if not indices:
+            return np.asarray(X, dtype=self.dtype)
+        X = np.asarray(X)
+        if not np.issubdtype(X.dtype, np.integer):
+            raise TypeError(f"feature indices must be integers, got {X.dtype}")
+        return X
+
+    @staticmethod
+    def _gather_sum(W, idx, out, tmp):
+        """out = W @ onehot(idx) = 各行索引取出的 W 列之和；代价与输入维度无关"""
+        np.take(W, idx[0], axis=1, out=out)
+        for row in idx[1:]:
+            out += np.take(W, row, axis=1, out=tmp)
+
+    def use_workspace(self, batch_size):
+        """
+        开启工作区模式：为固定批量大小预分配缓冲区，之后每步不再分配
+        与批量大小或参数量成正比的数组（加偏置、softmax 这类广播运算
+        numpy 内部仍会用一块固定大小的缓冲区，至多几十 KB）
+
+        参数:
+            batch_size: 每批样本数；None 表示关闭工作区模式
+
+        注意: 开启后 self.cache 中的数组会在下一步被覆盖，
+        需要保留时请自行 .copy()。批量大小不同的输入（如整个测试集）
+        仍走临时分配的路径。
+        """
+        if batch_size is None:
+            self.workspace = None
+        else:
+            self.workspace = Workspace(self.layer_dims, batch_size, self.dtype)
+        return self
+
+    def _workspace_for(self, m):
+        """取可复用的工作区；批量大小不匹配时临时分配一个"""
+        ws = self.workspace
+        if ws is None or ws.batch_size != m:
+            ws = Workspace(self.layer_dims, m, self.dtype)
+        return ws
+
+    @contextlib.contextmanager
+    def profile(self, track_memory=False):
+        """
+        在 with 块内记录 forward / backward / update 的逐层统计
+
+        参数:
+            track_memory: 是否同时记录每个操作的临时内存峰值（tracemalloc）
+        返回:
+            profiling.Profile 统计对象，可 stats.report() 或用 viz.plot_profile 画图
+        """
+        stats = self.stats = Profile(track_memory)
+        stats.start()
+        try:
+            yield stats
+        finally:
+            stats.stop()
+            self.stats = None
+
+    def _timed(self, phase, layer, op, *arrays):
+        """profile() 期间统计 with 块中的一个操作（代价公式见 _COSTS）；否则什么也不做"""
+        return timed(self.stats, phase, layer, op, _COSTS[phase, op], arrays)
+
+    def forward(self, X, indices=False):
+        """
+        前向传播
+
+        参数:
+            X: 稠密输入 (features, m)；indices=True 时为整数特征索引 (k, m)，见 _as_input
+            indices: X 是否为特征索引；backward 沿用同样的方式
+        """
+        X = self._as_input(X, indices)
+        self._index_input = indices
+        m = X.shape[1]
+
+        with self._timed('forward', 0, 'workspace'):
+            ws = self._ws = self._workspace_for(m)
+
+        self.cache = ws.cache
+        self.cache['A0'] = X
         A = X
 
-        # 隐藏层: ReLU
-        for l in range(1, self.L):
-            Z = self.params[f'W{l}'] @ A + self.params[f'b{l}']
-            A = self.relu(Z)
-            self.cache[f'Z{l}'] = Z
-            self.cache[f'A{l}'] = A
+        for l in range(1, self.L + 1):
+            W = self.params[f'W{l}']
+            Z = self.cache[f'Z{l}']
+
+            if l == 1 and self._index_input:
+                # 索引输入: 取出 W1 的对应列求和（dZ[1] 在反向之前空闲，借作临时缓冲区）
+                with self._timed('forward', l, 'gather', A, Z):
+                    self._gather_sum(W, A, Z, ws.dZ[1])
+            else:
+                with self._timed('forward', l, 'matmul', W, A, Z):
+                    np.matmul(W, A, out=Z)
 
-        # 输出层: Softmax
-        Z = self.params[f'W{self.L}'] @ A + self.params[f'b{self.L}']
-        A = self.softmax(Z)
-        self.cache[f'Z{self.L}'] = Z
-        self.cache[f'A{self.L}'] = A
+            with self._timed('forward', l, 'bias', Z):
+                Z += self.params[f'b{l}']
+
+            if l < self.L:
+                # 隐藏层: ReLU
+                with self._timed('forward', l, 'relu', Z):
+                    A = np.maximum(Z, 0, out=self.cache[f'A{l}'])
+                continue
+
+            # 输出层: Softmax（原地: 减最大值 -> exp -> 除以列和），
+            # 顺便得到 log-sum-exp = max + log(列和)，供损失直接使用
+            A = self.cache[f'A{l}']
+            with self._timed('forward', l, 'softmax', Z):
+                np.max(Z, axis=0, keepdims=True, out=ws.lse)
+                np.subtract(Z, ws.lse, out=A)
+                np.exp(A, out=A)
+                np.sum(A, axis=0, keepdims=True, out=ws.col)
+                A /= ws.col
+                ws.lse += np.log(ws.col, out=ws.col)
 
         return A
 
     def loss(self, Y):
-        """交叉熵损失"""
-        m = Y.shape[1]
-        AL = self.cache[f'A{self.L}']
-        return -np.sum(Y * np.log(AL + 1e-8)) / m
+        """
+        交叉熵损失，直接由 logits 计算: -log softmax(Z)[y] = logsumexp(Z) - Z[y]
+
+        参数:
+            Y: 整数标签 (m,) 或 one-hot 矩阵 (n_classes, m)；损失在 float64 中累加
+        """
+        m = Y.shape[-1]
+        Z = self.cache[f'Z{self.L}']
+        lse = self._ws.lse
+        if Y.ndim == 1:
+            # 整数标签：每列只取一个 logit，不需要 one-hot 矩阵
+            picked = Z[Y, self._ws.cols[:m]]
+            return np.sum(lse[0] - picked, dtype=np.float64) / m
+        return np.sum(Y * (lse - Z), dtype=np.float64) / m
 
     def backward(self, Y):
-        """反向传播"""
-        m = Y.shape[1]
-        self.grads = {}
+        """
+        反向传播
 
-        # 输出层
-        dZ = self.cache[f'A{self.L}'] - Y
-        self.grads[f'dW{self.L}'] = dZ @ self.cache[f'A{self.L-1}'].T / m
-        self.grads[f'db{self.L}'] = np.sum(dZ, axis=1, keepdims=True) / m
+        参数:
+            Y: 整数标签 (m,) 或 one-hot 矩阵 (n_classes, m)
+        """
+        m = Y.shape[-1]
+        ws = self._ws
+
+        # 输出层: dZ = softmax - onehot；整数标签时按索引原地减 1
+        dZ = ws.dZ[self.L]
+        with self._timed('backward', self.L, 'softmax', dZ):
+            if Y.ndim == 1:
+                np.copyto(dZ, self.cache[f'A{self.L}'])
+                dZ[Y, ws.cols[:m]] -= 1
+            else:
+                np.subtract(self.cache[f'A{self.L}'], Y, out=dZ)
+        self._param_grads(self.L, dZ, m)
 
         # 隐藏层
         for l in reversed(range(1, self.L)):
-            dA = self.params[f'W{l+1}'].T @ dZ
-            dZ = dA * self.relu_deriv(self.cache[f'Z{l}'])
-            self.grads[f'dW{l}'] = dZ @ self.cache[f'A{l-1}'].T / m
-            self.grads[f'db{l}'] = np.sum(dZ, axis=1, keepdims=True) / m
+            W = self.params[f'W{l+1}']
+            dA = ws.dZ[l]
+            with self._timed('backward', l, 'matmul', W.T, dZ, dA):
+                np.matmul(W.T, dZ, out=dA)
+
+            # ReLU: Z <= 0 处梯度为 0，按掩码原地清零（不必把布尔掩码转成浮点再相乘）
+            mask = ws.mask[l]
+            with self._timed('backward', l, 'relu', dA, mask):
+                np.less_equal(self.cache[f'Z{l}'], 0, out=mask)
+                np.copyto(dA, 0, where=mask)
+            dZ = dA
+            self._param_grads(l, dZ, m)
+
+    def _param_grads(self, l, dZ, m):
+        """把第 l 层的 dW, db 写入 self.grads"""
+        A_prev = self.cache[f'A{l-1}']
+        dW = self.grads[f'dW{l}']
+        db = self.grads[f'db{l}']
+
+        if l == 1 and self._index_input:
+            # 索引输入: 先把 dZ (n1, m) 缩放 1/m，再只累加到用到的那些列上。
+            # 其余列梯度为 0，而且上一步之后只有上一步用到的列可能非零，
+            # 所以只清这些列 —— 反向的代价只与用到的特征数有关，与输入维度无关
+            prev = self._grad_cols
+            cleared = dW.size if prev is None else dW.shape[0] * len(prev)
+            with self._timed('backward', l, 'scatter', dZ, A_prev, dW, cleared):
+                dZ /= m
+                if prev is None:
+                    dW[...] = 0
+                else:
+                    dW[:, prev] = 0
+                for idx in A_prev:
+                    np.add.at(dW.T, idx, dZ.T)
+                self._grad_cols = np.unique(A_prev)
+            with self._timed('backward', l, 'bias', dZ):
+                np.sum(dZ, axis=1, keepdims=True, out=db)
+            return
+
+        if l == 1:
+            self._grad_cols = None
+
+        with self._timed('backward', l, 'matmul', dZ, A_prev.T, dW):
+            np.matmul(dZ, A_prev.T, out=dW)
+            dW /= m
+
+        with self._timed('backward', l, 'bias', dZ):
+            np.sum(dZ, axis=1, keepdims=True, out=db)
+            db /= m
 
     def update(self, lr):
-        """梯度下降更新"""
-        for l in range(1, self.L + 1):
-            self.params[f'W{l}'] -= lr * self.grads[f'dW{l}']
-            self.params[f'b{l}'] -= lr * self.grads[f'db{l}']
+        """
+        梯度下降更新：对整个扁平缓冲区做一次向量运算
+
+        上一次反向是索引输入时，dW1 只有用到的那些列非零：W1 只更新这些列，
+        其余参数（W2.. 和所有偏置）仍是一次向量运算。
+        """
+        step = None if self.workspace is None else self.workspace.step
+        cols = self._grad_cols
+        if cols is None:
+            with self._timed('update', 0, 'sgd', self.flat_params):
+                self.flat_params -= np.multiply(self.flat_grads, lr, out=step)
+            return
+
+        # W1 是扁平缓冲区开头的一段
+        W1, dW1 = self.params['W1'], self.grads['dW1']
+        n = W1.size
+        skipped = W1.shape[0] * (W1.shape[1] - len(cols))
+        with self._timed('update', 0, 'sgd', self.flat_params, skipped):
+            W1[:, cols] -= lr * dW1[:, cols]
+            self.flat_params[n:] -= np.multiply(self.flat_grads[n:], lr,
+                                                out=None if step is None else step[n:])
+
+    def logits(self, X, chunk_size=4096, indices=False):
+        """
+        推理用的前向传播：只返回输出层 logits Z{L}，不写 self.cache
+
+        参数:
+            X: (features, m) 输入，或 indices=True 时的整数特征索引 (k, m)
+            chunk_size: 每次处理的样本数；各层缓冲区按块大小分配一次，逐块复用
+            indices: X 是否为特征索引，见 _as_input
+        """
+        X = np.asarray(X)
+        m = X.shape[1]
+        chunk = max(1, min(chunk_size, m))
+        bufs = [np.empty((n, chunk), dtype=self.dtype) for n in self.layer_dims[1:]]
+        out = np.empty((self.layer_dims[-1], m), dtype=self.dtype)
+        tmp = None
+
+        for lo in range(0, m, chunk):
+            hi = min(lo + chunk, m)
+            A = self._as_input(X[:, lo:hi], indices)
+            for l in range(1, self.L + 1):
+                Z = out[:, lo:hi] if l == self.L else bufs[l-1][:, :hi - lo]
+                if l == 1 and indices:
+                    if tmp is None:
+                        tmp = np.empty((self.layer_dims[1], chunk), dtype=self.dtype)
+                    self._gather_sum(self.params['W1'], A, Z, tmp[:, :hi - lo])
+                    Z += self.params['b1']
+                    A = np.maximum(Z, 0, out=Z) if l < self.L else Z
+                    continue
+                np.matmul(self.params[f'W{l}'], A, out=Z)
+                Z += self.params[f'b{l}']
+                A = np.maximum(Z, 0, out=Z) if l < self.L else Z
+        return out
 
-    def predict(self, X):
-        """预测类别"""
-        A = self.forward(X)
-        return np.argmax(A, axis=0)
+    def predict(self, X, chunk_size=4096, top_k=None, indices=False):
+        """
+        预测类别
+
+        softmax 不改变大小顺序，所以直接对 logits 取 argmax，不做归一化。
+
+        参数:
+            X: (features, m) 输入
+            chunk_size: 分块大小，限制大输入时的临时内存
+            top_k: 返回得分最高的 k 个类别 (k, m)，按得分从高到低；None 只返回 argmax (m,)
+            indices: X 是否为整数特征索引 (k, m)
+        """
+        Z = self.logits(X, chunk_size, indices)
+        if top_k is None:
+            return np.argmax(Z, axis=0)
+        idx = np.argpartition(-Z, top_k - 1, axis=0)[:top_k]
+        order = np.argsort(-np.take_along_axis(Z, idx, axis=0), axis=0, kind='stable')
+        return np.take_along_axis(idx, order, axis=0)
 
     def param_count(self):
         """总参数量"""
-        return sum(p.size for p in self.params.values())
+        return self.flat_params.size
+
+    def copy(self):
+        """参数独立的副本（不复制工作区和缓存）"""
+        model = type(self)(self.layer_dims, dtype=self.dtype, init=False)
+        model.flat_params[...] = self.flat_params
+        return model
+
+    def save(self, path):
+        """
+        保存模型: path.npy 为扁平参数（未压缩，可内存映射），path.json 为网络结构
+
+        参数:
+            path: 文件路径，不含扩展名（带 .npy 也可以）
+        """
+        path = _checkpoint_base(path)
+        np.save(path + '.npy', np.ascontiguousarray(self.flat_params))
+        with open(path + '.json', 'w') as f:
+            json.dump({'layer_dims': [int(n) for n in self.layer_dims],
+                       'dtype': self.dtype.name}, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        加载 save() 保存的模型
+
+        参数:
+            path: 文件路径，不含扩展名；只给名字且当前目录下没有时，在 MODEL_DIR 中查找
+            mmap_mode: 'r' 只读映射，不读入内存、多个进程共享页缓存（只能推理）；
+                'c' 写时复制，可以在此基础上继续训练，改动不会写回文件；
+                None 完整读入内存
+        返回:
+            SimpleNN 实例，flat_params 直接是映射到文件的数组
+        """
+        path = _checkpoint_base(path)
+        if not os.path.exists(path + '.npy') and not os.path.dirname(path):
+            path = os.path.join(MODEL_DIR, path)
+        with open(path + '.json') as f:
+            meta = json.load(f)
+        flat = np.load(path + '.npy', mmap_mode=mmap_mode)
+
+        model = cls(meta['layer_dims'], dtype=meta['dtype'], init=False)
+        if flat.shape != model.flat_params.shape or flat.dtype != model.dtype:
+            raise ValueError(f"{path}.npy holds {flat.dtype}{flat.shape}, expected "
+                             f"{model.dtype}{model.flat_params.shape} for {meta['layer_dims']}")
+        return model.use_buffers(flat, copy=False)
+
 
+def _checkpoint_base(path):
+    """去掉检查点路径的 .npy / .json 扩展名"""
+    path = os.fspath(path)
+    root, ext = os.path.splitext(path)
+    return root if ext in ('.npy', '.json') else path
 
-def train(model, X_train, y_train, X_test, y_test, epochs=500, lr=0.5, print_every=100):
+
+def iterate_minibatches(X, Y, batch_size, shuffle=True):
+    """
+    把 (X, Y) 按样本（列）切成 mini-batch 的生成器
+
+    参数:
+        X, Y: (features, samples) 格式的数据；Y 也可以是整数标签 (samples,)
+        batch_size: 每批样本数；最后一批可能不足
+        shuffle: 是否打乱顺序
+    """
+    m = X.shape[1]
+    order = np.random.permutation(m) if shuffle else np.arange(m)
+    for start in range(0, m, batch_size):
+        idx = order[start:start + batch_size]
+        yield X[:, idx], Y[..., idx]
+
+
+def _eval_subset(eval_data, eval_samples, seed=0):
+    """
+    评估集固定抽样：只在一小部分留出样本上算准确率
+
+    用独立的随机数生成器抽样，开不开 eval_samples 都不会改变全局随机数
+    （也就不会改变之后每个 epoch 的打乱顺序）
+    """
+    if eval_samples is None:
+        return eval_data
+    rng = np.random.default_rng(seed)
+    subset = {}
+    for name, (X, Y) in eval_data.items():
+        m = X.shape[1]
+        if m > eval_samples:
+            idx = np.sort(rng.choice(m, eval_samples, replace=False))
+            X, Y = X[:, idx], Y[..., idx]
+        subset[name] = (X, Y)
+    return subset
+
+
+def _fmt(value, spec):
+    """按 spec 格式化；数组（如 StackedNN 每个模型一个值）逐个格式化"""
+    if np.ndim(value) == 0:
+        return format(value, spec)
+    return np.array2string(np.asarray(value), separator=' ',
+                           formatter={'all': lambda v: format(v, spec)})
+
+
+def as_labels(Y):
+    """整数标签原样返回，one-hot 矩阵转为整数标签"""
+    return Y if Y.ndim == 1 else np.argmax(Y, axis=0)
+
+
+def accuracy(model, X, Y):
+    """分类准确率；Y 可以是整数标签或 one-hot（StackedNN 返回每个模型的准确率）"""
+    return np.mean(model.predict(X) == as_labels(Y), axis=-1)
+
+
+def fit(model, batches, lr=0.5, eval_data=None, eval_every=100, eval_samples=None,
+        steps=None, verbose=True, optimizer=None, callback=None):
+    """
+    流式 mini-batch 训练：每个 (X, Y) 批次做一步梯度下降
+
+    参数:
+        model: SimpleNN 实例
+        batches: 任意 (X, Y) 批次的可迭代对象或生成器，
+            数据可以来自磁盘或无限流，不需要一次装进内存
+        lr: 学习率
+        eval_data: 评估集字典，如 {'train': (X, Y), 'test': (X, Y)}
+        eval_every: 每隔多少步评估一次准确率
+        eval_samples: 每个评估集只固定抽取这么多样本；None 表示用全部
+        steps: 最多训练多少步；None 表示直到 batches 耗尽。
+            多次调用时可以传同一个生成器，接着上次的位置继续训练
+        verbose: 评估时是否打印进度
+        optimizer: optim 模块中的优化器；None 表示用 model.update(lr) 做普通 SGD
+        callback: 每步结束（含评估）后调用 callback(step, history)
+
+    返回:
+        history: {'loss': 每步损失, 'eval_step': 评估所在步数,
+                  '<name>_acc': 各评估集准确率}
+    """
+    eval_data = _eval_subset(eval_data or {}, eval_samples)
+    history = {'loss': [], 'eval_step': []}
+    for name in eval_data:
+        history[f'{name}_acc'] = []
+
+    if steps is not None:
+        batches = itertools.islice(batches, steps)
+
+    step = 0
+    for X, Y in batches:
+        model.forward(X)
+        history['loss'].append(model.loss(Y))
+        model.backward(Y)
+        if optimizer is None:
+            model.update(lr)
+        else:
+            optimizer.step()
+        step += 1
+
+        if eval_data and step % eval_every == 0:
+            history['eval_step'].append(step)
+            for name, (X_eval, Y_eval) in eval_data.items():
+                history[f'{name}_acc'].append(accuracy(model, X_eval, Y_eval))
+            if verbose:
+                accs = ' | '.join(f"{name.capitalize()}: {_fmt(history[f'{name}_acc'][-1], '.2%')}"
+                                  for name in eval_data)
+                print(f"Step {step:5d} | Loss: {_fmt(history['loss'][-1], '.4f')} | {accs}")
+
+        if callback is not None:
+            callback(step, history)
+
+    return history
+
+
+def train(model, X_train, y_train, X_test, y_test, epochs=500, lr=0.5, print_every=100,
+          batch_size=None, eval_every=1, eval_samples=None, optimizer=None):
     """
     训练模型并记录过程
 
+    参数:
+        batch_size: mini-batch 大小；None 表示每个 epoch 一次全批量更新
+        eval_every: 每隔多少个 epoch 计算一次准确率
+        eval_samples: 只在固定抽取的这么多样本上算准确率；None 表示全部
+        optimizer: optim 模块中的优化器；None 表示普通 SGD（使用 lr）
+
     返回:
-        history: 包含 loss, train_acc, test_acc 的字典
+        history: {'loss': 每个 epoch 的损失, 'eval_epoch': 评估所在的 epoch（从 1 开始）,
+                  'train_acc', 'test_acc': 对应的准确率}
     """
-    history = {'loss': [], 'train_acc': [], 'test_acc': []}
+    history = {'loss': [], 'eval_epoch': [], 'train_acc': [], 'test_acc': []}
+    eval_data = _eval_subset({'train': (X_train, y_train), 'test': (X_test, y_test)},
+                             eval_samples)
 
     for epoch in range(epochs):
         # 前向 + 反向 + 更新
-        model.forward(X_train)
-        loss = model.loss(y_train)
-        model.backward(y_train)
-        model.update(lr)
-
-        # 计算准确率
-        train_pred = model.predict(X_train)
-        train_true = np.argmax(y_train, axis=0)
-        train_acc = np.mean(train_pred == train_true)
+        if batch_size is None:
+            model.forward(X_train)
+            loss = model.loss(y_train)
+            model.backward(y_train)
+            if optimizer is None:
+                model.update(lr)
+            else:
+                optimizer.step()
+        else:
+            batch_hist = fit(model, iterate_minibatches(X_train, y_train, batch_size),
+                             lr=lr, verbose=False, optimizer=optimizer)
+            loss = np.mean(batch_hist['loss'], axis=0)
+        history['loss'].append(loss)
 
-        test_pred = model.predict(X_test)
-        test_true = np.argmax(y_test, axis=0)
-        test_acc = np.mean(test_pred == test_true)
+        if (epoch + 1) % eval_every != 0:
+            continue
 
-        history['loss'].append(loss)
+        # 计算准确率
+        train_acc = accuracy(model, *eval_data['train'])
+        test_acc = accuracy(model, *eval_data['test'])
+        history['eval_epoch'].append(epoch + 1)
         history['train_acc'].append(train_acc)
         history['test_acc'].append(test_acc)
 
         if print_every and (epoch + 1) % print_every == 0:
-            print(f"Epoch {epoch+1:3d} | Loss: {loss:.4f} | Train: {train_acc:.2%} | Test: {test_acc:.2%}")
+            print(f"Epoch {epoch+1:3d} | Loss: {_fmt(loss, '.4f')} | "
+                  f"Train: {_fmt(train_acc, '.2%')} | Test: {_fmt(test_acc, '.2%')}")
 
     return history
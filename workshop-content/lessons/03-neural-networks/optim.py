@@ -0,0 +1,151 @@
+"""优化器：SGD / Momentum / RMSProp / Adam
+
+所有优化器都直接作用在 SimpleNN 的扁平缓冲区 (flat_params / flat_grads) 上，
+动量等状态在创建时一次性分配，每一步都原地更新，不产生临时数组。
+
+用法:
+    opt = Adam(model, lr=1e-3)
+    history = train(model, X_train, y_train, X_test, y_test, optimizer=opt)
+"""
+
+import numpy as np
+
+from profiling import timed
+
+
+class Optimizer:
+    """优化器基类"""
+
+    # 每个参数每步大约的浮点运算次数和读写的缓冲区个数（供 profiling 统计）
+    FLOPS_PER_PARAM = 2
+    BUFFERS = 3
+
+    def __init__(self, model, lr, weight_decay=0.0):
+        """
+        参数:
+            model: SimpleNN 实例
+            lr: 学习率
+            weight_decay: L2 权重衰减系数，只作用于权重，不作用于偏置
+        """
+        self.model = model
+        self.lr = lr
+        self.weight_decay = weight_decay
+        self.t = 0
+        self._tmp = np.empty_like(model.flat_params)
+
+    def _grad(self):
+        """取本步梯度；有权重衰减时原地加上 weight_decay * W"""
+        g = self.model.flat_grads
+        if self.weight_decay:
+            n = self.model.n_weights
+            tmp = np.multiply(self.model.flat_params[:n], self.weight_decay, out=self._tmp[:n])
+            g[:n] += tmp
+            # dW1 不再只有索引输入用到的列非零，下一步反向要整个清零
+            self.model._grad_cols = None
+        return g
+
+    def step(self):
+        """用 model.flat_grads 更新 model.flat_params"""
+        with timed(self.model.stats, 'update', 0, type(self).__name__.lower(), self._cost):
+            self.t += 1
+            self._step(self.model.flat_params, self._grad(), self._tmp)
+
+    def _cost(self):
+        """profiling 用的 (FLOPs, 读写字节数)"""
+        return self.FLOPS_PER_PARAM * self._tmp.size, 2 * self.BUFFERS * self._tmp.nbytes
+
+    def _step(self, p, g, tmp):
+        raise NotImplementedError
+
+
+class SGD(Optimizer):
+    """普通梯度下降: w = w - lr * g"""
+
+    def _step(self, p, g, tmp):
+        np.multiply(g, self.lr, out=tmp)
+        p -= tmp
+
+
+class Momentum(Optimizer):
+    """
+    SGD + 动量: v = βv + (1-β)g,  w = w - lr * v
+
+    与 diagrams.plot_momentum_visualization 中的公式一致
+    """
+
+    FLOPS_PER_PARAM = 5
+    BUFFERS = 4
+
+    def __init__(self, model, lr, beta=0.9, weight_decay=0.0):
+        super().__init__(model, lr, weight_decay)
+        self.beta = beta
+        self.v = np.zeros_like(model.flat_params)
+
+    def _step(self, p, g, tmp):
+        self.v *= self.beta
+        self.v += np.multiply(g, 1 - self.beta, out=tmp)
+        p -= np.multiply(self.v, self.lr, out=tmp)
+
+
+class RMSProp(Optimizer):
+    """RMSProp: s = ρs + (1-ρ)g²,  w = w - lr * g / (√s + ε)"""
+
+    FLOPS_PER_PARAM = 9
+    BUFFERS = 4
+
+    def __init__(self, model, lr, rho=0.9, eps=1e-8, weight_decay=0.0):
+        super().__init__(model, lr, weight_decay)
+        self.rho = rho
+        self.eps = eps
+        self.s = np.zeros_like(model.flat_params)
+
+    def _step(self, p, g, tmp):
+        self.s *= self.rho
+        np.multiply(g, g, out=tmp)
+        tmp *= 1 - self.rho
+        self.s += tmp
+
+        np.sqrt(self.s, out=tmp)
+        tmp += self.eps
+        np.divide(g, tmp, out=tmp)
+        tmp *= self.lr
+        p -= tmp
+
+
+class Adam(Optimizer):
+    """
+    Adam: 一阶矩 m 和二阶矩 v 的指数滑动平均，带偏差修正
+
+        m = β1·m + (1-β1)g,  v = β2·v + (1-β2)g²
+        w = w - lr · m̂ / (√v̂ + ε)
+    """
+
+    FLOPS_PER_PARAM = 13
+    BUFFERS = 5
+
+    def __init__(self, model, lr=1e-3, beta1=0.9, beta2=0.999, eps=1e-8, weight_decay=0.0):
+        super().__init__(model, lr, weight_decay)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.m = np.zeros_like(model.flat_params)
+        self.v = np.zeros_like(model.flat_params)
+
+    def _step(self, p, g, tmp):
+        self.m *= self.beta1
+        self.m += np.multiply(g, 1 - self.beta1, out=tmp)
+
+        self.v *= self.beta2
+        np.multiply(g, g, out=tmp)
+        tmp *= 1 - self.beta2
+        self.v += tmp
+
+        # 偏差修正并入步长和 ε，省去 m̂、v̂ 两个临时数组
+        c2 = np.sqrt(1 - self.beta2 ** self.t)
+        step_size = self.lr * c2 / (1 - self.beta1 ** self.t)
+
+        np.sqrt(self.v, out=tmp)
+        tmp += self.eps * c2
+        np.divide(self.m, tmp, out=tmp)
+        tmp *= step_size
+        p -= tmp
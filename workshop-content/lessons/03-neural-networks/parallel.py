@@ -0,0 +1,215 @@
+"""数据并行训练：把每个 mini-batch 切给多个进程，梯度在共享内存中平均
+
+参数、当前批次和每个进程的梯度都放在 multiprocessing.shared_memory 中：
+    - 主进程的 SimpleNN.flat_params 就是共享内存，更新后各进程立即可见
+    - 每个进程把自己那一段样本的梯度写进共享的 (n_workers, P) 数组中的一行
+    - 主进程用一次矩阵乘法按样本数加权平均，得到整批梯度
+进程间只传递 (起始列, 结束列) 和标量损失，不会 pickle 任何数组。
+
+用法:
+    model = SimpleNN([784, 128, 64, 10], dtype=np.float32)
+    with DataParallel(model, n_workers=4, batch_size=512) as dp:
+        history = fit(dp, iterate_minibatches(X, y, 512), lr=0.1)
+
+DataParallel 提供和 SimpleNN 相同的 forward / loss / backward / update / predict，
+所以可以直接交给 fit() / train()；优化器请用原始 model 构造（参数缓冲区是同一份）。
+固定随机种子时结果是确定的（各进程的切分和求和顺序都固定），
+但与单进程训练在浮点舍入上可能略有差异。
+numpy 的 BLAS 默认会在每个进程里再开多线程，建议启动内核前设置
+OPENBLAS_NUM_THREADS=1（或 OMP_NUM_THREADS=1），避免 4 个进程争抢 4 个 CPU。
+"""
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from network import SimpleNN, as_labels
+
+
+def attach_shared_memory(name):
+    """工作进程按名字连接主进程创建的共享内存（由主进程负责释放）"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 没有 track 参数；子进程与主进程共用同一个 resource tracker，
+        # 重复登记不会导致提前释放
+        return shared_memory.SharedMemory(name=name)
+
+
+def _shared_arrays(shms, layer_dims, dtype, n_params, n_workers, batch_size):
+    """在共享内存块上建立 numpy 视图: params, grads, X, y"""
+    return (
+        np.ndarray((n_params,), dtype=dtype, buffer=shms['params'].buf),
+        np.ndarray((n_workers, n_params), dtype=dtype, buffer=shms['grads'].buf),
+        np.ndarray((layer_dims[0], batch_size), dtype=dtype, buffer=shms['X'].buf),
+        np.ndarray((batch_size,), dtype=np.int64, buffer=shms['y'].buf),
+    )
+
+
+def _worker(rank, conn, layer_dims, dtype, names, n_workers, batch_size):
+    """工作进程：计算第 rank 段样本的损失和梯度，写入共享梯度的第 rank 行"""
+    shms = {key: attach_shared_memory(name) for key, name in names.items()}
+    # 参数马上换成共享内存里的那一份，不需要随机初始化
+    model = SimpleNN(layer_dims, dtype=dtype, init=False)
+    params, grads, X_buf, y_buf = _shared_arrays(
+        shms, layer_dims, model.dtype, model.param_count(), n_workers, batch_size)
+    model.use_buffers(params, grads[rank], copy=False)
+
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        lo, hi = msg
+        if hi == lo:
+            model.flat_grads[...] = 0
+            conn.send(0.0)
+            continue
+        if model.workspace is None or model.workspace.batch_size != hi - lo:
+            model.use_workspace(hi - lo)
+        y = y_buf[lo:hi]
+        model.forward(X_buf[:, lo:hi])
+        loss = model.loss(y)
+        model.backward(y)
+        conn.send(loss)
+
+    del model, params, grads, X_buf, y_buf
+    for shm in shms.values():
+        shm.close()
+    conn.close()
+
+
+class DataParallel:
+    """把 SimpleNN 的每个 mini-batch 按样本切给 n_workers 个进程计算梯度"""
+
+    def __init__(self, model, n_workers=4, batch_size=256):
+        """
+        参数:
+            model: SimpleNN 实例；其参数会被移到共享内存中
+            n_workers: 进程数（用户容器 cpu_limit = 4）
+            batch_size: 最大批量大小，用于分配共享的批次缓冲区
+        """
+        self.model = model
+        self.n_workers = n_workers
+        self.batch_size = batch_size
+
+        dtype = model.dtype
+        n_params = model.param_count()
+        sizes = {
+            'params': n_params * dtype.itemsize,
+            'grads': n_workers * n_params * dtype.itemsize,
+            'X': model.layer_dims[0] * batch_size * dtype.itemsize,
+            'y': batch_size * np.dtype(np.int64).itemsize,
+        }
+        self._shms = {}
+        self._conns = []
+        self._procs = []
+        try:
+            for key, size in sizes.items():
+                self._shms[key] = shared_memory.SharedMemory(create=True, size=size)
+            params, self._grads, self._X, self._y = _shared_arrays(
+                self._shms, model.layer_dims, dtype, n_params, n_workers, batch_size)
+            model.use_buffers(params)
+
+            names = {key: shm.name for key, shm in self._shms.items()}
+            for rank in range(n_workers):
+                parent, child = mp.Pipe()
+                proc = mp.Process(target=_worker, daemon=True,
+                                  args=(rank, child, model.layer_dims, dtype, names,
+                                        n_workers, batch_size))
+                proc.start()
+                child.close()
+                self._conns.append(parent)
+                self._procs.append(proc)
+        except BaseException:
+            # 启动失败时调用方拿不到对象，也就不会再有 close()
+            params = None
+            self._abort()
+            raise
+
+        self._pending = None
+        self._loss = None
+
+    def compute_grads(self, X, Y):
+        """
+        并行计算一个批次的平均损失，并把平均梯度写入 model.flat_grads
+
+        参数:
+            X: (features, m) 输入，m <= batch_size
+            Y: 整数标签 (m,) 或 one-hot (n_classes, m)
+        """
+        m = X.shape[1]
+        if m > self.batch_size:
+            raise ValueError(f"batch of {m} samples exceeds batch_size={self.batch_size}")
+        self._X[:, :m] = X
+        self._y[:m] = as_labels(Y)
+
+        # 按列均匀切分，每个进程一段
+        bounds = np.linspace(0, m, self.n_workers + 1).astype(int)
+        for conn, lo, hi in zip(self._conns, bounds[:-1], bounds[1:]):
+            conn.send((int(lo), int(hi)))
+        losses = np.array([conn.recv() for conn in self._conns])
+
+        # 每段梯度已是段内平均，按段内样本数加权后求和
+        weights = (np.diff(bounds) / m).astype(self.model.dtype)
+        np.matmul(weights, self._grads, out=self.model.flat_grads)
+        return float(np.dot(np.diff(bounds) / m, losses))
+
+    # ---- 与 SimpleNN 相同的接口，便于直接交给 fit() / train() ----
+
+    def forward(self, X):
+        self._pending = X
+        self._loss = None
+
+    def loss(self, Y):
+        self._loss = self.compute_grads(self._pending, Y)
+        return self._loss
+
+    def backward(self, Y):
+        if self._loss is None:
+            self.compute_grads(self._pending, Y)
+        self._loss = None
+
+    def update(self, lr):
+        self.model.update(lr)
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def _abort(self):
+        """__init__ 中途失败时的清理：停掉已启动的进程，参数移回普通内存，释放共享内存"""
+        for proc in self._procs:
+            proc.terminate()
+            proc.join()
+        for conn in self._conns:
+            conn.close()
+        self._procs = []
+        self.model.use_buffers(self.model.flat_params.copy(), copy=False)
+        self._grads = self._X = self._y = None
+        for shm in self._shms.values():
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        """停止工作进程，把参数复制回普通内存并释放共享内存"""
+        if not self._procs:
+            return
+        for conn in self._conns:
+            conn.send(None)
+        for proc in self._procs:
+            proc.join()
+        for conn in self._conns:
+            conn.close()
+        self._procs = []
+
+        self.model.use_buffers(self.model.flat_params.copy(), copy=False)
+        del self._grads, self._X, self._y
+        for shm in self._shms.values():
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,142 @@
+"""训练步骤的逐层性能统计：耗时、FLOPs、搬运字节数、临时内存峰值
+
+用法:
+    with model.profile(track_memory=True) as stats:
+        train(model, X_train, y_train, X_test, y_test, epochs=50)
+    stats.report()
+    plot_profile(stats)          # viz.py
+
+网络代码里用 `with timed(stats, phase, layer, op, cost, args):` 包住一个操作；
+关闭时 (stats 为 None) 每个操作只多一次函数调用和 `is None` 判断，
+FLOPs 和字节数也只在开启时才由 cost(*args) 计算。
+"""
+
+import contextlib
+import time
+import tracemalloc
+
+
+_UNTIMED = contextlib.nullcontext()
+
+
+def timed(stats, phase, layer, op, cost=None, args=()):
+    """
+    统计 with 块中一个操作的上下文；stats 为 None 时什么也不做
+
+    参数:
+        stats: Profile 实例或 None
+        phase, layer, op: 同 Profile.toc
+        cost: 可选，cost(*args) 返回 (flops, nbytes)，在操作结束后调用
+        args: 传给 cost 的参数（通常是参与运算的数组）
+    """
+    if stats is None:
+        return _UNTIMED
+    return stats.timed(phase, layer, op, cost, args)
+
+
+class Profile:
+    """按 (阶段, 层, 操作) 累计的性能统计"""
+
+    FIELDS = ('calls', 'seconds', 'flops', 'bytes', 'peak_mem')
+
+    def __init__(self, track_memory=False):
+        """
+        参数:
+            track_memory: 是否用 tracemalloc 记录每个操作分配的临时内存峰值
+                （numpy 的分配会被 tracemalloc 统计到；开启后会稍慢）
+        """
+        self.track_memory = track_memory
+        self.records = {}
+        self._mem0 = 0
+        self._started_tracing = False
+
+    def start(self):
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def tic(self):
+        """开始计时一个操作"""
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            self._mem0 = tracemalloc.get_traced_memory()[0]
+        return time.perf_counter()
+
+    def toc(self, t0, phase, layer, op, flops, nbytes):
+        """
+        结束计时并累计
+
+        参数:
+            t0: tic() 的返回值
+            phase: 'forward' / 'backward' / 'update'
+            layer: 层号（update 等整体操作为 0）
+            op: 操作名，如 'matmul'、'relu'、'softmax'
+            flops: 浮点运算次数
+            nbytes: 读写的数组字节数
+        """
+        seconds = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] - self._mem0 if self.track_memory else 0
+
+        rec = self.records.get((phase, layer, op))
+        if rec is None:
+            rec = self.records[(phase, layer, op)] = [0, 0.0, 0, 0, 0]
+        rec[0] += 1
+        rec[1] += seconds
+        rec[2] += flops
+        rec[3] += nbytes
+        rec[4] = max(rec[4], peak)
+
+    @contextlib.contextmanager
+    def timed(self, phase, layer, op, cost=None, args=()):
+        """tic() / toc() 的上下文管理器版本，参数见 timed()"""
+        t0 = self.tic()
+        yield
+        flops, nbytes = cost(*args) if cost is not None else (0, 0)
+        self.toc(t0, phase, layer, op, flops, nbytes)
+
+    def total_seconds(self):
+        return sum(rec[1] for rec in self.records.values())
+
+    def table(self, by=('phase', 'layer', 'op')):
+        """
+        按给定的键聚合，返回按耗时降序排列的行
+
+        参数:
+            by: ('phase', 'layer', 'op') 的子集，如 ('op',) 按操作类型汇总
+        返回:
+            [{'phase': ..., 'layer': ..., 'op': ..., 'calls': ..., 'seconds': ...,
+              'flops': ..., 'bytes': ..., 'peak_mem': ...}, ...]
+        """
+        names = ('phase', 'layer', 'op')
+        groups = {}
+        for key, rec in self.records.items():
+            group = tuple(k for name, k in zip(names, key) if name in by)
+            acc = groups.setdefault(group, [0, 0.0, 0, 0, 0])
+            for i in range(4):
+                acc[i] += rec[i]
+            acc[4] = max(acc[4], rec[4])
+
+        rows = []
+        for group, acc in groups.items():
+            row = dict(zip([name for name in names if name in by], group))
+            row.update(zip(self.FIELDS, acc))
+            rows.append(row)
+        return sorted(rows, key=lambda r: r['seconds'], reverse=True)
+
+    def report(self, by=('phase', 'layer', 'op')):
+        """打印统计表"""
+        total = self.total_seconds() or 1.0
+        keys = [name for name in ('phase', 'layer', 'op') if name in by]
+        header = ' '.join(f'{k:<10}' for k in keys)
+        print(f"{header} {'calls':>7} {'ms':>9} {'%':>6} {'GFLOP/s':>8} {'GB/s':>7} {'peak KB':>8}")
+        for row in self.table(by):
+            s = row['seconds'] or 1e-12
+            cols = ' '.join(f'{str(row[k]):<10}' for k in keys)
+            print(f"{cols} {row['calls']:>7} {row['seconds'] * 1e3:>9.2f} "
+                  f"{row['seconds'] / total:>6.1%} {row['flops'] / s / 1e9:>8.2f} "
+                  f"{row['bytes'] / s / 1e9:>7.2f} {row['peak_mem'] / 1024:>8.1f}")
@@ -0,0 +1,165 @@
+"""同时训练 K 个同结构网络：参数叠成 (K, ...) 的数组，用批量矩阵乘法一步算完
+
+课程里经常要用不同学习率或随机种子训练同一个网络做对比。
+与其用 Python 循环跑 K 次 SimpleNN，不如把 K 组权重叠在前导维度上：
+    W{l}: (K, n_l, n_{l-1}),  Z{l} = W{l} @ A{l-1} + b{l}: (K, n_l, m)
+这样一步训练只是几次更大的 np.matmul。
+
+用法:
+    models = StackedNN([20, 16, 16, 10], n_models=3, seeds=[0, 1, 2])
+    history = train(models, X_train, y_train, X_test, y_test,
+                    lr=np.array([0.05, 0.5, 2.0]), print_every=100)
+    # history['loss'][epoch] 是形状 (3,) 的数组，每个模型一个值；打印时也是每个模型一列
+"""
+
+import numpy as np
+
+from network import SimpleNN, param_layout
+
+
+class StackedNN:
+    """K 个 SimpleNN 叠在一起的批量版本；接口与 SimpleNN 相同，返回值多一个 K 维"""
+
+    def __init__(self, layer_dims, n_models, dtype=np.float64, seeds=None, init=True):
+        """
+        参数:
+            layer_dims: 每层神经元数量
+            n_models: 模型个数 K
+            dtype: 数据类型
+            seeds: 每个模型的随机种子；给定时第 k 个模型的初始权重与
+                np.random.seed(seeds[k]); SimpleNN(layer_dims) 完全相同，
+                且不改变调用方的全局随机数状态
+            init: False 时参数全为 0、不消耗全局随机数（参数马上会被覆盖时使用）
+        """
+        self.layer_dims = layer_dims
+        self.dtype = np.dtype(dtype)
+        self.L = len(layer_dims) - 1
+        self.K = n_models
+
+        self.layout, size = param_layout(layer_dims)
+        self.flat_params = np.zeros((n_models, size), dtype=self.dtype)
+        self.flat_grads = np.zeros((n_models, size), dtype=self.dtype)
+        self.params = self.views(self.flat_params)
+        self.grads = self.views(self.flat_grads, prefix='d')
+
+        if init:
+            # 指定种子时暂时借用全局随机数，结束后恢复调用方的状态
+            state = np.random.get_state()
+            for k in range(n_models):
+                if seeds is not None:
+                    np.random.seed(seeds[k])
+                self.flat_params[k] = SimpleNN(layer_dims, dtype=self.dtype).flat_params
+            if seeds is not None:
+                np.random.set_state(state)
+
+    def views(self, flat, prefix=''):
+        """把 (K, P) 缓冲区切成按层命名的 (K, ...) 视图"""
+        return {prefix + name: flat[:, offset:offset + shape[0] * shape[1]].reshape(-1, *shape)
+                for name, shape, offset in self.layout}
+
+    def forward(self, X):
+        """
+        前向传播
+
+        参数:
+            X: 所有模型共用的输入 (features, m)，或每个模型各自的输入 (K, features, m)
+        返回:
+            输出层 softmax 概率 (K, n_classes, m)
+        """
+        X = np.asarray(X, dtype=self.dtype)
+        self.cache = {'A0': X}
+        A = X
+
+        # 隐藏层: ReLU
+        for l in range(1, self.L):
+            Z = np.matmul(self.params[f'W{l}'], A)
+            Z += self.params[f'b{l}']
+            self.cache[f'Z{l}'] = Z
+            A = self.cache[f'A{l}'] = np.maximum(Z, 0)
+
+        # 输出层: Softmax，同时保留 log-sum-exp 供损失使用
+        Z = np.matmul(self.params[f'W{self.L}'], A)
+        Z += self.params[f'b{self.L}']
+        zmax = np.max(Z, axis=1, keepdims=True)
+        A = np.exp(Z - zmax)
+        s = np.sum(A, axis=1, keepdims=True)
+        A /= s
+        self._lse = zmax + np.log(s)
+        self.cache[f'Z{self.L}'] = Z
+        self.cache[f'A{self.L}'] = A
+        return A
+
+    def loss(self, Y):
+        """
+        每个模型的交叉熵损失
+
+        参数:
+            Y: 所有模型共用的整数标签 (m,) 或 one-hot (n_classes, m)
+        返回:
+            (K,) 数组
+        """
+        m = Y.shape[-1]
+        Z = self.cache[f'Z{self.L}']
+        if Y.ndim == 1:
+            picked = Z[:, Y, np.arange(m)]
+            return np.sum(self._lse[:, 0] - picked, axis=1, dtype=np.float64) / m
+        return np.sum(Y * (self._lse - Z), axis=(1, 2), dtype=np.float64) / m
+
+    def backward(self, Y):
+        """反向传播，梯度写入 self.grads（即 flat_grads 的视图）"""
+        m = Y.shape[-1]
+
+        # 输出层: dZ = softmax - onehot
+        dZ = self.cache[f'A{self.L}'].copy()
+        if Y.ndim == 1:
+            dZ[:, Y, np.arange(m)] -= 1
+        else:
+            dZ -= Y
+
+        for l in reversed(range(1, self.L + 1)):
+            A_prev = self.cache[f'A{l-1}']
+            dW = np.matmul(dZ, np.swapaxes(A_prev, -1, -2), out=self.grads[f'dW{l}'])
+            dW /= m
+            db = np.sum(dZ, axis=2, keepdims=True, out=self.grads[f'db{l}'])
+            db /= m
+            if l > 1:
+                dZ = np.matmul(np.swapaxes(self.params[f'W{l}'], 1, 2), dZ)
+                dZ *= self.cache[f'Z{l-1}'] > 0
+
+    def update(self, lr):
+        """
+        梯度下降更新
+
+        参数:
+            lr: 所有模型共用的学习率，或每个模型各自的学习率 (K,)
+        """
+        lr = np.asarray(lr, dtype=self.dtype).reshape(-1, 1)
+        self.flat_params -= lr * self.flat_grads
+
+    def logits(self, X):
+        """
+        推理用的前向传播：只返回输出层 logits (K, n_classes, m)，不写 self.cache
+
+        参数:
+            X: 同 forward
+        """
+        A = np.asarray(X, dtype=self.dtype)
+        for l in range(1, self.L + 1):
+            Z = np.matmul(self.params[f'W{l}'], A)
+            Z += self.params[f'b{l}']
+            A = np.maximum(Z, 0, out=Z) if l < self.L else Z
+        return Z
+
+    def predict(self, X):
+        """每个模型的预测类别 (K, m)；不影响上一次 forward 留下的缓存"""
+        return np.argmax(self.logits(X), axis=1)
+
+    def param_count(self):
+        """单个模型的参数量"""
+        return self.flat_params.shape[1]
+
+    def unstack(self, k):
+        """取出第 k 个模型，返回独立的 SimpleNN（参数为副本）"""
+        model = SimpleNN(self.layer_dims, dtype=self.dtype, init=False)
+        model.flat_params[...] = self.flat_params[k]
+        return model
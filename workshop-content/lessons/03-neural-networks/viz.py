@@ -2,22 +2,32 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.colors import to_rgba
+
+from diagrams.render import draw_edges, draw_neurons
 
 
 def plot_training_history(history, figsize=(12, 4)):
-    """绘制训练过程的损失和准确率曲线"""
+    """
+    绘制训练过程的损失和准确率曲线
+
+    准确率画在 history['eval_epoch'] 记录的 epoch 上（train(eval_every > 1) 时并非每个
+    epoch 都有）；没有该字段时认为每个 epoch 都评估过
+    """
     fig, axes = plt.subplots(1, 2, figsize=figsize)
+    epochs = np.arange(1, len(history['loss']) + 1)
+    eval_epochs = history.get('eval_epoch') or np.arange(1, len(history['train_acc']) + 1)
 
     # 损失曲线
-    axes[0].plot(history['loss'], 'b-', linewidth=1.5)
+    axes[0].plot(epochs, history['loss'], 'b-', linewidth=1.5)
     axes[0].set_xlabel('Epoch', fontsize=12)
     axes[0].set_ylabel('Loss', fontsize=12)
     axes[0].set_title('Training Loss', fontsize=14, fontweight='bold')
     axes[0].grid(alpha=0.3)
 
     # 准确率曲线
-    axes[1].plot(history['train_acc'], 'b-', linewidth=1.5, label='Train')
-    axes[1].plot(history['test_acc'], 'r--', linewidth=1.5, label='Test')
+    axes[1].plot(eval_epochs, history['train_acc'], 'b-', linewidth=1.5, label='Train')
+    axes[1].plot(eval_epochs, history['test_acc'], 'r--', linewidth=1.5, label='Test')
     axes[1].set_xlabel('Epoch', fontsize=12)
     axes[1].set_ylabel('Accuracy', fontsize=12)
     axes[1].set_title('Accuracy', fontsize=14, fontweight='bold')
@@ -29,7 +39,61 @@ def plot_training_history(history, figsize=(12, 4)):
     plt.show()
 
 
-def plot_result_matrix(model, encode_fn, num_range=10, max_sum=None, figsize=(8, 7)):
+def plot_profile(stats, figsize=(13, 4.5)):
+    """
+    绘制 model.profile() 收集的耗时分布
+
+    参数:
+        stats: profiling.Profile 实例
+    左图按 (阶段, 层) 分组，每根柱子按操作类型堆叠；右图按操作类型汇总，标注 GFLOP/s
+    """
+    rows = stats.table(by=('phase', 'layer', 'op'))
+    phases = ['forward', 'backward', 'update']
+    groups = sorted({(r['phase'], r['layer']) for r in rows},
+                    key=lambda g: (phases.index(g[0]) if g[0] in phases else len(phases), g[1]))
+    ops = [r['op'] for r in stats.table(by=('op',))]
+
+    ms = np.zeros((len(ops), len(groups)))
+    for r in rows:
+        ms[ops.index(r['op']), groups.index((r['phase'], r['layer']))] += r['seconds'] * 1e3
+
+    fig, axes = plt.subplots(1, 2, figsize=figsize, gridspec_kw={'width_ratios': [2, 1]})
+    colors = plt.cm.tab10(np.arange(len(ops)) % 10)
+
+    # 每层耗时，按操作堆叠
+    x = np.arange(len(groups))
+    bottom = np.zeros(len(groups))
+    for i, op in enumerate(ops):
+        axes[0].bar(x, ms[i], bottom=bottom, color=colors[i], label=op)
+        bottom += ms[i]
+    axes[0].set_xticks(x)
+    axes[0].set_xticklabels([phase if phase == 'update' else f'{phase}\nL{layer}'
+                             for phase, layer in groups], fontsize=9)
+    axes[0].set_ylabel('Time (ms)', fontsize=12)
+    axes[0].set_title('Time per Layer', fontsize=14, fontweight='bold')
+    axes[0].legend(fontsize=9)
+    axes[0].grid(alpha=0.3, axis='y')
+
+    # 按操作类型汇总
+    totals = stats.table(by=('op',))
+    y = np.arange(len(totals))[::-1]
+    axes[1].barh(y, [r['seconds'] * 1e3 for r in totals], color=colors[:len(totals)])
+    axes[1].set_yticks(y)
+    axes[1].set_yticklabels([r['op'] for r in totals])
+    for yi, r in zip(y, totals):
+        if r['seconds'] > 0 and r['flops']:
+            axes[1].text(r['seconds'] * 1e3, yi, f" {r['flops'] / r['seconds'] / 1e9:.2f} GFLOP/s",
+                         va='center', fontsize=8, color='gray')
+    axes[1].set_xlabel('Time (ms)', fontsize=12)
+    axes[1].set_title('Time per Op', fontsize=14, fontweight='bold')
+    axes[1].grid(alpha=0.3, axis='x')
+
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_result_matrix(model, encode_fn, num_range=10, max_sum=None, figsize=(8, 7),
+                       max_text=20):
     """
     绘制加法预测结果矩阵
 
@@ -38,21 +102,19 @@ def plot_result_matrix(model, encode_fn, num_range=10, max_sum=None, figsize=(8,
         encode_fn: 输入编码函数 encode_fn(a, b) -> vector
         num_range: 数字范围 (0 到 num_range-1)
         max_sum: 最大和限制，None 表示无限制
+        max_text: num_range 超过该值时只画热力图，不在格子里写数字
     """
-    matrix = np.zeros((num_range, num_range))
-    correct = np.zeros((num_range, num_range))
-    valid = np.zeros((num_range, num_range))
-
-    for a in range(num_range):
-        for b in range(num_range):
-            if max_sum is not None and a + b >= max_sum:
-                continue
-            valid[a, b] = 1
-            x = encode_fn(a, b).reshape(-1, 1)
-            pred = model.predict(x)[0]
-            true = a + b
-            matrix[a, b] = pred
-            correct[a, b] = (pred == true)
+    a, b = np.meshgrid(np.arange(num_range), np.arange(num_range), indexing='ij')
+    valid = np.ones((num_range, num_range), dtype=bool)
+    if max_sum is not None:
+        valid = a + b < max_sum
+
+    # 所有有效组合编码成一个矩阵，一次批量预测；没有有效格子时只画空网格
+    matrix = np.zeros((num_range, num_range), dtype=int)
+    if valid.any():
+        X = np.stack([encode_fn(i, j) for i, j in zip(a[valid], b[valid])], axis=1)
+        matrix[valid] = model.predict(X)
+    correct = valid & (matrix == a + b)
 
     fig, ax = plt.subplots(figsize=figsize)
 
@@ -60,21 +122,21 @@ def plot_result_matrix(model, encode_fn, num_range=10, max_sum=None, figsize=(8,
     display = np.where(valid, correct, 0.5)
     ax.imshow(display, cmap='RdYlGn', vmin=0, vmax=1)
 
-    for i in range(num_range):
-        for j in range(num_range):
-            if valid[i, j]:
-                pred = int(matrix[i, j])
-                color = 'black' if correct[i, j] else 'white'
-                ax.text(j, i, str(pred), ha='center', va='center',
-                        fontsize=10, color=color, fontweight='bold')
-            else:
-                ax.text(j, i, '-', ha='center', va='center',
-                        fontsize=10, color='gray')
+    if num_range <= max_text:
+        for i in range(num_range):
+            for j in range(num_range):
+                if valid[i, j]:
+                    color = 'black' if correct[i, j] else 'white'
+                    ax.text(j, i, str(matrix[i, j]), ha='center', va='center',
+                            fontsize=10, color=color, fontweight='bold')
+                else:
+                    ax.text(j, i, '-', ha='center', va='center',
+                            fontsize=10, color='gray')
+        ax.set_xticks(range(num_range))
+        ax.set_yticks(range(num_range))
 
     ax.set_ylabel('a', fontsize=12)
     ax.set_title('a + b Predictions', fontsize=14, fontweight='bold')
-    ax.set_xticks(range(num_range))
-    ax.set_yticks(range(num_range))
 
     # 只计算有效区域的准确率
     valid_correct = correct[valid == 1]
@@ -87,7 +149,7 @@ def plot_result_matrix(model, encode_fn, num_range=10, max_sum=None, figsize=(8,
     return acc
 
 
-def plot_hidden_activations(model, encode_fn, test_cases, figsize=(12, 6)):
+def plot_hidden_activations(model, encode_fn, test_cases, figsize=(12, 6), max_bars=12):
     """
     绘制不同输入的隐藏层激活模式
 
@@ -95,18 +157,35 @@ def plot_hidden_activations(model, encode_fn, test_cases, figsize=(12, 6)):
         model: 训练好的模型
         encode_fn: 输入编码函数
         test_cases: [(a, b), ...] 测试用例列表
+        max_bars: 用例数超过该值时改画一张 (神经元 × 用例) 热力图
     """
+    # 所有用例一次前向传播，第 k 列是第 k 个用例的激活
+    X = np.stack([encode_fn(a, b) for a, b in test_cases], axis=1)
+    model.forward(X)
+    acts = np.array(model.cache['A1'][:, :X.shape[1]])
+
     n_cases = len(test_cases)
+    if n_cases > max_bars:
+        fig, ax = plt.subplots(figsize=figsize)
+        im = ax.imshow(acts, aspect='auto', cmap='Blues', interpolation='nearest')
+        if n_cases <= 50:
+            ax.set_xticks(range(n_cases))
+            ax.set_xticklabels([f'{a}+{b}' for a, b in test_cases], rotation=90, fontsize=8)
+        ax.set_xlabel('Test Case')
+        ax.set_ylabel('Neuron Index')
+        plt.colorbar(im, ax=ax, label='Activation')
+        ax.set_title('Hidden Layer Activations', fontsize=14, fontweight='bold')
+        plt.tight_layout()
+        plt.show()
+        return
+
     n_cols = min(3, n_cases)
     n_rows = (n_cases + n_cols - 1) // n_cols
 
     fig, axes = plt.subplots(n_rows, n_cols, figsize=figsize)
     axes = np.atleast_2d(axes).flatten()
 
-    for ax, (a, b) in zip(axes, test_cases):
-        x = encode_fn(a, b).reshape(-1, 1)
-        model.forward(x)
-        act = model.cache['A1'].flatten()
+    for ax, (a, b), act in zip(axes, test_cases, acts.T):
         result = a + b
 
         ax.bar(range(len(act)), act, color='steelblue', alpha=0.7)
@@ -183,12 +262,11 @@ def plot_forward_pass(model, a, b, encode_fn, figsize=(14, 10), max_neurons=10):
             positions.append((x_pos, y_pos))
         neuron_positions.append(positions)
 
-    # 绘制连接线（先画，在神经元下面）
+    # 绘制连接线（先画，在神经元下面；每对相邻层一个 LineCollection）
     for layer_idx in range(n_layers - 1):
-        for pos1 in neuron_positions[layer_idx]:
-            for pos2 in neuron_positions[layer_idx + 1]:
-                ax.plot([pos1[0], pos2[0]], [pos1[1], pos2[1]],
-                        color='lightgray', linewidth=0.5, zorder=1)
+        draw_edges(ax, np.array(neuron_positions[layer_idx]),
+                   np.array(neuron_positions[layer_idx + 1]),
+                   colors='lightgray', linewidths=0.5, zorder=1)
 
     # 颜色映射：激活值 -> 颜色
     cmap = plt.cm.Blues
@@ -206,24 +284,21 @@ def plot_forward_pass(model, a, b, encode_fn, figsize=(14, 10), max_neurons=10):
         else:
             act_normalized = np.ones_like(act_values) * 0.5
 
+        # 神经元颜色基于激活值；预测结果高亮
+        colors = cmap(act_normalized)
+        edgecolors = ['steelblue'] * len(indices)
+        linewidths = np.full(len(indices), 1.5)
+        if layer_idx == n_layers - 1 and pred_result in indices:
+            k = indices.index(pred_result)
+            colors[k] = to_rgba('gold')
+            edgecolors[k] = 'darkorange'
+            linewidths[k] = 3
+        draw_neurons(ax, np.array(positions), neuron_radius, facecolors=colors,
+                     edgecolors=edgecolors, linewidths=linewidths, zorder=2)
+
         for i, (pos, idx, act, act_norm) in enumerate(
                 zip(positions, indices, act_values, act_normalized)):
 
-            # 神经元颜色基于激活值
-            if layer_idx == n_layers - 1 and idx == pred_result:
-                # 预测结果高亮
-                color = 'gold'
-                edgecolor = 'darkorange'
-                linewidth = 3
-            else:
-                color = cmap(act_norm)
-                edgecolor = 'steelblue'
-                linewidth = 1.5
-
-            circle = plt.Circle(pos, neuron_radius, color=color,
-                                ec=edgecolor, linewidth=linewidth, zorder=2)
-            ax.add_patch(circle)
-
             # 显示激活值
             if layer_idx == 0:
                 # 输入层：显示哪个位置被激活（one-hot）
@@ -284,3 +359,128 @@ def plot_forward_pass(model, a, b, encode_fn, figsize=(14, 10), max_neurons=10):
         if l == model.L:
             top3_idx = np.argsort(act)[-3:][::-1]
             print(f"  Top 3: {[(idx, f'{act[idx]:.3f}') for idx in top3_idx]}")
+
+
+class LivePlot:
+    """
+    训练曲线的实时图：创建一次图形，之后只用 set_data 更新已有的曲线
+
+    坐标轴范围不变时用 blitting 只重绘曲线本身；数据超出范围才整图重绘一次
+    （范围按 2 倍扩展，重绘次数是对数级的）。不支持 blitting 的后端
+    （如 inline）退化为整图重绘。
+    """
+
+    def __init__(self, eval_names=('train', 'test'), figsize=(12, 4)):
+        """
+        参数:
+            eval_names: 要画准确率曲线的评估集名字，对应 history['<name>_acc']
+        """
+        self.eval_names = list(eval_names)
+        self.fig, self.axes = plt.subplots(1, 2, figsize=figsize)
+        ax_loss, ax_acc = self.axes
+
+        (self.loss_line,) = ax_loss.plot([], [], 'b-', linewidth=1.5, animated=True)
+        ax_loss.set_xlabel('Step', fontsize=12)
+        ax_loss.set_ylabel('Loss', fontsize=12)
+        ax_loss.set_title('Training Loss', fontsize=14, fontweight='bold')
+        ax_loss.grid(alpha=0.3)
+        ax_loss.set_xlim(0, 10)
+        ax_loss.set_ylim(0, 1)
+
+        styles = ['b-', 'r--', 'g-.', 'm:']
+        self.acc_lines = {}
+        for i, name in enumerate(self.eval_names):
+            (self.acc_lines[name],) = ax_acc.plot([], [], styles[i % len(styles)], linewidth=1.5,
+                                                  label=name.capitalize(), animated=True)
+        ax_acc.set_xlabel('Step', fontsize=12)
+        ax_acc.set_ylabel('Accuracy', fontsize=12)
+        ax_acc.set_title('Accuracy', fontsize=14, fontweight='bold')
+        ax_acc.legend(handles=list(self.acc_lines.values()), loc='lower right')
+        ax_acc.grid(alpha=0.3)
+        ax_acc.set_xlim(0, 10)
+        ax_acc.set_ylim([0, 1.05])
+
+        plt.tight_layout()
+        self._timer = None
+        self._display = None
+        self._background = None
+        self._blit = self.fig.canvas.supports_blit and 'inline' not in plt.get_backend()
+        if not self._blit:
+            # inline 后端: 图片显示在一个可替换的输出区域里，每次整图替换
+            from IPython.display import display
+            for artist in self._artists():
+                artist.set_animated(False)
+            self._display = display(self.fig, display_id=True)
+            plt.close(self.fig)
+        self._redraw()
+
+    def _artists(self):
+        return [self.loss_line, *self.acc_lines.values()]
+
+    def _redraw(self):
+        """整图重绘，并保存不含曲线的背景供 blitting 使用"""
+        canvas = self.fig.canvas
+        if self._blit:
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+            for artist in self._artists():
+                self.axes[0].draw_artist(artist)
+            canvas.blit(self.fig.bbox)
+        elif self._display is not None:
+            self._display.update(self.fig)
+
+    def update(self, history):
+        """
+        用最新的 history 刷新曲线
+
+        参数:
+            history: fit() / BackgroundTrainer.history 格式的字典
+        """
+        ax_loss, ax_acc = self.axes
+        loss = np.asarray(history['loss'], dtype=float)
+        steps = np.arange(1, len(loss) + 1)
+        self.loss_line.set_data(steps, loss)
+
+        eval_step = history.get('eval_step') or []
+        for name, line in self.acc_lines.items():
+            acc = history.get(f'{name}_acc', [])
+            line.set_data(eval_step[:len(acc)], acc)
+
+        # 数据超出当前范围时扩大坐标轴并整图重绘
+        rescale = False
+        if len(loss) and len(loss) > ax_loss.get_xlim()[1]:
+            ax_loss.set_xlim(0, 2 * len(loss))
+            ax_acc.set_xlim(0, 2 * len(loss))
+            rescale = True
+        finite = loss[np.isfinite(loss)]
+        if len(finite) and finite.max() > ax_loss.get_ylim()[1]:
+            ax_loss.set_ylim(0, 1.2 * finite.max())
+            rescale = True
+
+        if rescale or not self._blit:
+            self._redraw()
+            return
+        canvas = self.fig.canvas
+        canvas.restore_region(self._background)
+        for artist in self._artists():
+            artist.axes.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def follow(self, trainer, interval=500):
+        """
+        每 interval 毫秒从 BackgroundTrainer 取新数据并刷新，训练结束后自动停止
+
+        需要交互式后端（如 %matplotlib widget）；inline 后端请在需要时
+        手动调用 plot.update(trainer.history)（先 trainer.poll()）。
+        """
+        def tick():
+            trainer.poll()
+            self.update(trainer.history)
+            if not trainer.running:
+                self._timer.stop()
+
+        self._timer = self.fig.canvas.new_timer(interval=interval)
+        self._timer.add_callback(tick)
+        self._timer.start()
+        return self
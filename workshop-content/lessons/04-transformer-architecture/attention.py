@@ -0,0 +1,200 @@
+"""批量多头注意力：(batch, heads, seq, d) 张量上的缩放点积注意力
+
+notebook 里的 scaled_dot_product_attention 一次只算一个头、一条序列，
+并且总是生成完整的 (n, n) 分数矩阵。这里:
+    - 所有 batch 和 head 用一次批量矩阵乘法 (np.matmul) 同时计算
+    - 1/√d 缩放乘在 Q 上（n·d 次乘法，而不是 n² 次）
+    - 掩码用布尔数组（True = 可以看到，与 notebook 中掩码图的约定一致），
+      因果掩码不需要显式构造
+    - block_size 不为 None 时按块处理 key，用在线 softmax（随块更新的最大值和分母）
+      累加输出，永远不会生成完整的 (n, n) 分数矩阵，内存从 O(n²) 降到 O(n·block)；
+      因果掩码下完全被遮住的块直接跳过
+
+用法:
+    mha = MultiHeadAttention(d_model=512, n_heads=8, seed=0)
+    y = mha(x, causal=True)                     # x: (batch, seq, d_model)
+    y = mha(x, causal=True, block_size=256)     # 长序列：分块计算，结果相同
+
+    out = attention(Q, K, V, causal=True)        # Q, K, V: (batch, heads, seq, d)
+"""
+
+import numpy as np
+
+
+def split_heads(x, n_heads):
+    """(batch, seq, n_heads·d) → (batch, n_heads, seq, d)"""
+    *batch, n, d_model = x.shape
+    return x.reshape(*batch, n, n_heads, d_model // n_heads).swapaxes(-2, -3)
+
+
+def merge_heads(x):
+    """(batch, n_heads, seq, d) → (batch, seq, n_heads·d)"""
+    *batch, h, n, d = x.shape
+    return x.swapaxes(-2, -3).reshape(*batch, n, h * d)
+
+
+def causal_mask(n_q, n_k=None):
+    """
+    布尔因果掩码 (n_q, n_k)，True = 可以看到
+
+    n_k > n_q 时（如带 KV 缓存的生成），query 是最后 n_q 个位置。
+    """
+    n_k = n_q if n_k is None else n_k
+    return np.arange(n_k)[None, :] <= np.arange(n_q)[:, None] + (n_k - n_q)
+
+
+def _visible(mask, causal, q0, q1, k0, k1, n_q, n_k):
+    """query [q0, q1) 与 key [k0, k1) 这一块的可见性；全部可见时返回 None"""
+    visible = None
+    if mask is not None:
+        mask = np.broadcast_to(mask, mask.shape[:-2] + (n_q, n_k))
+        visible = mask[..., q0:q1, k0:k1]
+    # 这一块有 key 在对角线右上方时才需要因果掩码
+    if causal and k1 - 1 > q0 + (n_k - n_q):
+        c = np.arange(k0, k1)[None, :] <= np.arange(q0, q1)[:, None] + (n_k - n_q)
+        visible = c if visible is None else visible & c
+    return visible
+
+
+def _softmax_(scores):
+    """原地对最后一维做 softmax；整行都被遮住（全是 -inf）时输出 0"""
+    m = scores.max(axis=-1, keepdims=True)
+    m[~np.isfinite(m)] = 0
+    scores -= m
+    np.exp(scores, out=scores)
+    total = scores.sum(axis=-1, keepdims=True)
+    total[total == 0] = 1
+    scores /= total
+    return scores
+
+
+def scaled_dot_product_attention(Q, K, V, mask=None, causal=False, return_weights=False):
+    """
+    标准（完整分数矩阵）的缩放点积注意力
+
+    参数:
+        Q: (..., n_q, d)，前面的维度如 (batch, heads)
+        K: (..., n_k, d)
+        V: (..., n_k, d_v)
+        mask: 可选布尔数组，可广播到 (..., n_q, n_k)，True = 可以看到
+        causal: 是否加因果掩码（query i 只能看到不晚于它的 key）
+        return_weights: 是否同时返回注意力权重
+    返回:
+        output: (..., n_q, d_v)
+        attention_weights: (..., n_q, n_k)（仅 return_weights=True 时）
+    """
+    Q = Q * np.asarray(1 / np.sqrt(Q.shape[-1]), dtype=Q.dtype)
+    scores = Q @ K.swapaxes(-1, -2)
+    visible = _visible(mask, causal, 0, Q.shape[-2], 0, K.shape[-2], Q.shape[-2], K.shape[-2])
+    if visible is not None:
+        np.copyto(scores, -np.inf, where=~visible)
+    weights = _softmax_(scores)
+    output = weights @ V
+    return (output, weights) if return_weights else output
+
+
+def blockwise_attention(Q, K, V, mask=None, causal=False, block_size=128):
+    """
+    分块计算的注意力（在线 softmax），结果与 scaled_dot_product_attention 相同
+
+    每次只处理 block_size 个 query × block_size 个 key 的分数块。对每个 query 维护
+    目前见过的最大分数 m、softmax 分母 l 和未归一化的输出 acc；新的一块来了以后
+    把旧的 l、acc 乘上 exp(m_old - m_new) 再累加，最后 acc / l 即为输出。
+
+    参数:
+        同 scaled_dot_product_attention；block_size: 块大小
+    返回:
+        output: (..., n_q, d_v)
+    """
+    n_q, n_k = Q.shape[-2], K.shape[-2]
+    batch = np.broadcast_shapes(Q.shape[:-2], K.shape[:-2], V.shape[:-2])
+    dtype = np.result_type(Q, K, V)
+    Q = Q * np.asarray(1 / np.sqrt(Q.shape[-1]), dtype=Q.dtype)
+    Kt = K.swapaxes(-1, -2)
+    output = np.empty(batch + (n_q, V.shape[-1]), dtype=dtype)
+
+    for q0 in range(0, n_q, block_size):
+        q1 = min(q0 + block_size, n_q)
+        q = Q[..., q0:q1, :]
+        m = np.full(batch + (q1 - q0, 1), -np.inf, dtype=dtype)
+        l = np.zeros(batch + (q1 - q0, 1), dtype=dtype)
+        acc = np.zeros(batch + (q1 - q0, V.shape[-1]), dtype=dtype)
+        # 因果掩码下，这些 query 看不到 k_end 之后的 key，整块跳过
+        k_end = min(n_k, q1 + (n_k - n_q)) if causal else n_k
+
+        for k0 in range(0, k_end, block_size):
+            k1 = min(k0 + block_size, k_end)
+            s = q @ Kt[..., k0:k1]
+            visible = _visible(mask, causal, q0, q1, k0, k1, n_q, n_k)
+            if visible is not None:
+                np.copyto(s, -np.inf, where=~visible)
+
+            m_new = np.maximum(m, s.max(axis=-1, keepdims=True))
+            # 到目前为止整行都被遮住时 m_new = -inf，用 0 作为平移量避免 nan
+            shift = np.where(np.isfinite(m_new), m_new, 0)
+            s -= shift
+            np.exp(s, out=s)
+            scale = np.exp(m - shift)
+            l *= scale
+            l += s.sum(axis=-1, keepdims=True)
+            acc *= scale
+            acc += s @ V[..., k0:k1, :]
+            m = m_new
+
+        l[l == 0] = 1
+        np.divide(acc, l, out=output[..., q0:q1, :])
+    return output
+
+
+def attention(Q, K, V, mask=None, causal=False, block_size=None):
+    """block_size 为 None 时用完整分数矩阵，否则分块计算"""
+    if block_size is None:
+        return scaled_dot_product_attention(Q, K, V, mask, causal)
+    return blockwise_attention(Q, K, V, mask, causal, block_size)
+
+
+class MultiHeadAttention:
+    """多头自注意力层：Q、K、V 用一个融合的 (d_model, 3·d_model) 投影一次算出"""
+
+    def __init__(self, d_model, n_heads, seed=None, dtype=np.float32):
+        """
+        参数:
+            d_model: 模型维度，需能被 n_heads 整除
+            n_heads: 头数
+            seed: 初始化权重的随机种子
+            dtype: 参数类型
+        """
+        if d_model % n_heads:
+            raise ValueError(f"d_model={d_model} is not divisible by n_heads={n_heads}")
+        self.d_model = d_model
+        self.n_heads = n_heads
+        self.dtype = np.dtype(dtype)
+        rng = np.random.default_rng(seed)
+        std = np.sqrt(1 / d_model)
+        self.W_qkv = (rng.standard_normal((d_model, 3 * d_model)) * std).astype(self.dtype)
+        self.W_o = (rng.standard_normal((d_model, d_model)) * std).astype(self.dtype)
+
+    def qkv(self, x):
+        """
+        x: (batch, seq, d_model) → Q, K, V，各为 (batch, n_heads, seq, d_head)
+        """
+        q, k, v = np.split(x @ self.W_qkv, 3, axis=-1)
+        return (split_heads(q, self.n_heads), split_heads(k, self.n_heads),
+                split_heads(v, self.n_heads))
+
+    def project(self, heads):
+        """各头的输出 (batch, n_heads, seq, d_head) → (batch, seq, d_model)"""
+        return merge_heads(heads) @ self.W_o
+
+    def __call__(self, x, mask=None, causal=False, block_size=None):
+        """
+        参数:
+            x: (batch, seq, d_model)
+            mask: 可选布尔数组，可广播到 (batch, n_heads, seq, seq)，True = 可以看到
+            causal: 是否加因果掩码
+            block_size: 不为 None 时分块计算注意力（长序列省内存）
+        返回:
+            (batch, seq, d_model)
+        """
+        Q, K, V = self.qkv(np.asarray(x, dtype=self.dtype))
+        return self.project(attention(Q, K, V, mask, causal, block_size))
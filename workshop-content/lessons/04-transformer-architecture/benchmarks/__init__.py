@@ -0,0 +1,2 @@
+# benchmarks - 注意力实现 (attention.py) 的性能基准
+# Run from the lesson directory, e.g. `python -m benchmarks.attention`
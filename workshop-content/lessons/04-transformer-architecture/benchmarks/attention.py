@@ -0,0 +1,87 @@
+"""注意力基准：完整分数矩阵 vs 分块（在线 softmax）的时间和峰值内存随序列长度的变化
+
+另外给出 notebook 中逐个头循环 np.dot 的写法作为参照（只在较短序列上运行）。
+峰值内存用 tracemalloc 统计（numpy 的数组分配会登记到 tracemalloc），不含输入本身。
+
+用法（在 04-transformer-architecture 目录下运行）:
+    python -m benchmarks.attention
+    python -m benchmarks.attention --seq-lens 512 1024 2048 4096 8192 --block-size 256 --causal
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from attention import blockwise_attention, scaled_dot_product_attention
+
+
+def per_head_loop(Q, K, V, causal=False):
+    """notebook 的写法：每个 (batch, head) 单独 np.dot，加性掩码"""
+    out = np.empty_like(Q)
+    n = Q.shape[-2]
+    mask = 1 - np.tril(np.ones((n, n), dtype=Q.dtype)) if causal else None
+    for b in range(Q.shape[0]):
+        for h in range(Q.shape[1]):
+            scores = np.dot(Q[b, h], K[b, h].T) / np.sqrt(Q.shape[-1])
+            if mask is not None:
+                scores = scores + (mask * -1e9)
+            w = np.exp(scores - np.max(scores, axis=-1, keepdims=True))
+            w = w / np.sum(w, axis=-1, keepdims=True)
+            out[b, h] = np.dot(w, V[b, h])
+    return out
+
+
+def measure(fn, repeats=3):
+    """返回 (最短耗时秒数, 峰值内存字节, 结果)"""
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seq-lens', type=int, nargs='+', default=[256, 512, 1024, 2048, 4096])
+    parser.add_argument('--batch', type=int, default=1)
+    parser.add_argument('--heads', type=int, default=8)
+    parser.add_argument('--d-head', type=int, default=64)
+    parser.add_argument('--block-size', type=int, default=256)
+    parser.add_argument('--causal', action='store_true')
+    parser.add_argument('--loop-max', type=int, default=1024, help='逐头循环只跑到这个长度')
+    parser.add_argument('--dtype', default='float32')
+    args = parser.parse_args()
+
+    print(f"batch={args.batch} heads={args.heads} d_head={args.d_head} "
+          f"block_size={args.block_size} causal={args.causal} dtype={args.dtype}")
+    print(f"{'seq':>6} {'method':>10} {'ms':>9} {'peak MB':>9} {'max err':>9}")
+    rng = np.random.default_rng(0)
+    for n in args.seq_lens:
+        shape = (args.batch, args.heads, n, args.d_head)
+        Q, K, V = (rng.standard_normal(shape).astype(args.dtype) for _ in range(3))
+        methods = {
+            'dense': lambda: scaled_dot_product_attention(Q, K, V, causal=args.causal),
+            'blockwise': lambda: blockwise_attention(Q, K, V, causal=args.causal,
+                                                     block_size=args.block_size),
+        }
+        if n <= args.loop_max:
+            methods['loop'] = lambda: per_head_loop(Q, K, V, causal=args.causal)
+
+        reference = None
+        for name, fn in methods.items():
+            seconds, peak, out = measure(fn)
+            if reference is None:
+                reference = out
+            err = np.abs(out - reference).max()
+            print(f"{n:>6} {name:>10} {seconds * 1e3:>9.1f} {peak / 2**20:>9.1f} {err:>9.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""自回归生成基准：有无 KV 缓存时每秒生成的 token 数随生成长度的变化
+
+权重随机，只比较解码引擎的速度；同时检查两种方式贪心生成的 token 是否完全一致。
+
+用法（在 04-transformer-architecture 目录下运行）:
+    python -m benchmarks.generation
+    python -m benchmarks.generation --lengths 64 128 256 512 --d-model 256 --layers 6
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from decoder import Decoder
+
+
+def tokens_per_second(model, prompt, n_new, use_cache):
+    start = time.perf_counter()
+    tokens = model.generate(prompt, n_new, use_cache=use_cache)
+    return prompt.shape[0] * n_new / (time.perf_counter() - start), tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[32, 64, 128, 256])
+    parser.add_argument('--prompt-len', type=int, default=16)
+    parser.add_argument('--batch', type=int, default=1)
+    parser.add_argument('--vocab', type=int, default=1000)
+    parser.add_argument('--d-model', type=int, default=128)
+    parser.add_argument('--heads', type=int, default=4)
+    parser.add_argument('--layers', type=int, default=4)
+    parser.add_argument('--no-cache-max', type=int, default=256, help='不带缓存只跑到这个长度')
+    args = parser.parse_args()
+
+    model = Decoder(args.vocab, args.d_model, args.heads, args.layers,
+                    max_len=args.prompt_len + max(args.lengths), seed=0)
+    prompt = np.random.default_rng(0).integers(0, args.vocab, (args.batch, args.prompt_len))
+    model.generate(prompt, 2)  # 预热
+
+    print(f"d_model={args.d_model} heads={args.heads} layers={args.layers} "
+          f"batch={args.batch} prompt={args.prompt_len}")
+    print(f"{'new':>6} {'cached tok/s':>13} {'no-cache tok/s':>15} {'speedup':>8} {'same':>6}")
+    for n in args.lengths:
+        cached, a = tokens_per_second(model, prompt, n, use_cache=True)
+        if n > args.no_cache_max:
+            print(f"{n:>6} {cached:>13.0f} {'-':>15} {'-':>8} {'-':>6}")
+            continue
+        full, b = tokens_per_second(model, prompt, n, use_cache=False)
+        print(f"{n:>6} {cached:>13.0f} {full:>15.0f} {cached / full:>8.1f} "
+              f"{str(np.array_equal(a, b)):>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""仅解码器（GPT 式）的小型 Transformer 与自回归生成，带预分配的 KV 缓存
+
+不带缓存时，每生成一个 token 都要把整个序列重新过一遍网络：第 t 步的注意力是 O(t²)，
+生成 n 个 token 总共 O(n³)。每一层的 K、V 只取决于它之前的 token，算过一次就不会变，
+所以把它们存进一块预先分配好的缓存 (层, batch, 头, max_len, d_head)：
+    - 先把提示词一次性算完（prefill），写入缓存
+    - 之后每步只算新 token 的 Q、K、V，把 K、V 写到缓存第 t 个位置，
+      新 Q 与缓存中前 t+1 个 K、V 做注意力 —— 第 t 步只需 O(t)
+缓存在生成开始时一次分配好，解码过程中不会再增长或复制。
+
+位置编码和 Layer Norm 与 transformer_architecture.ipynb 中的函数相同，注意力用 attention.py。
+权重是随机的，生成的内容没有意义；这里关心的是解码引擎的计算量如何随长度增长。
+
+用法:
+    model = Decoder(vocab_size=1000, d_model=128, n_heads=4, n_layers=4, max_len=1024, seed=0)
+    tokens = model.generate(prompt, n_new=200)                   # prompt: (batch, n) 整数
+    tokens = model.generate(prompt, n_new=200, use_cache=False)  # 每步重算整个序列，结果相同
+"""
+
+import numpy as np
+
+from attention import MultiHeadAttention, attention
+
+
+def positional_encoding(max_len, d_model):
+    """
+    生成正弦位置编码
+
+    参数:
+        max_len: 最大序列长度
+        d_model: 嵌入维度
+    """
+    pe = np.zeros((max_len, d_model))
+    position = np.arange(0, max_len)[:, np.newaxis]
+    div_term = np.exp(np.arange(0, d_model, 2) * -(np.log(10000.0) / d_model))
+
+    pe[:, 0::2] = np.sin(position * div_term)
+    pe[:, 1::2] = np.cos(position * div_term)
+
+    return pe
+
+
+def layer_norm(x, gamma, beta, eps=1e-5):
+    """
+    Layer Normalization
+
+    参数:
+        x: 输入 (..., d)
+        gamma: 缩放参数 (d,)
+        beta: 平移参数 (d,)
+        eps: 防止除零的小常数
+    """
+    mean = np.mean(x, axis=-1, keepdims=True)
+    var = np.var(x, axis=-1, keepdims=True)
+    x_norm = (x - mean) / np.sqrt(var + eps)
+    return gamma * x_norm + beta
+
+
+class KVCache:
+    """每一层已经算过的 K、V，整块预先分配"""
+
+    def __init__(self, n_layers, batch, n_heads, max_len, d_head, dtype=np.float32):
+        shape = (n_layers, batch, n_heads, max_len, d_head)
+        self.k = np.empty(shape, dtype=dtype)
+        self.v = np.empty(shape, dtype=dtype)
+        self.max_len = max_len
+        self.length = 0
+
+    def write(self, layer, K, V):
+        """
+        把新位置的 K、V (batch, heads, n, d_head) 写到 [length, length+n)
+
+        返回:
+            该层到目前为止全部的 K、V 视图 (batch, heads, length+n, d_head)
+        """
+        end = self.length + K.shape[-2]
+        if end > self.max_len:
+            raise ValueError(f"sequence of {end} tokens exceeds cache max_len={self.max_len}")
+        self.k[layer, :, :, self.length:end] = K
+        self.v[layer, :, :, self.length:end] = V
+        return self.k[layer, :, :, :end], self.v[layer, :, :, :end]
+
+
+class DecoderBlock:
+    """Pre-LN 解码器层：x + Attn(LN(x))，再 x + FFN(LN(x))"""
+
+    def __init__(self, d_model, n_heads, rng, dtype=np.float32):
+        self.attn = MultiHeadAttention(d_model, n_heads, seed=rng.integers(2**32), dtype=dtype)
+        d_ff = 4 * d_model
+        self.W1 = (rng.standard_normal((d_model, d_ff)) * np.sqrt(2 / d_model)).astype(dtype)
+        self.b1 = np.zeros(d_ff, dtype=dtype)
+        self.W2 = (rng.standard_normal((d_ff, d_model)) * np.sqrt(1 / d_ff)).astype(dtype)
+        self.b2 = np.zeros(d_model, dtype=dtype)
+        self.ln1 = (np.ones(d_model, dtype=dtype), np.zeros(d_model, dtype=dtype))
+        self.ln2 = (np.ones(d_model, dtype=dtype), np.zeros(d_model, dtype=dtype))
+
+    def __call__(self, x, cache=None, layer=0, block_size=None):
+        """
+        参数:
+            x: (batch, n, d_model)，n 个新位置
+            cache: 可选的 KVCache；给定时 x 接在缓存里已有的 cache.length 个位置之后
+            layer: 本层在缓存中的编号
+            block_size: 传给 attention()，长提示词可以分块计算
+        """
+        Q, K, V = self.attn.qkv(layer_norm(x, *self.ln1))
+        if cache is not None:
+            K, V = cache.write(layer, K, V)
+        # 只有一个新位置时它能看到缓存中的全部 key，不需要因果掩码
+        causal = Q.shape[-2] > 1
+        x = x + self.attn.project(attention(Q, K, V, causal=causal, block_size=block_size))
+        h = layer_norm(x, *self.ln2) @ self.W1
+        h += self.b1
+        np.maximum(h, 0, out=h)
+        return x + (h @ self.W2 + self.b2)
+
+
+class Decoder:
+    """词嵌入 + 位置编码 → n_layers 个 DecoderBlock → LN → 与嵌入共享权重的输出层"""
+
+    def __init__(self, vocab_size, d_model=128, n_heads=4, n_layers=4, max_len=1024,
+                 seed=None, dtype=np.float32):
+        """
+        参数:
+            vocab_size: 词表大小
+            d_model, n_heads: 模型维度和头数
+            n_layers: 层数
+            max_len: 最长序列（位置编码和 KV 缓存的大小）
+            seed: 随机初始化的种子
+            dtype: 参数和计算类型
+        """
+        rng = np.random.default_rng(seed)
+        self.dtype = np.dtype(dtype)
+        self.d_model = d_model
+        self.n_heads = n_heads
+        self.max_len = max_len
+        self.embedding = (rng.standard_normal((vocab_size, d_model)) * 0.02).astype(dtype)
+        self.pe = positional_encoding(max_len, d_model).astype(dtype)
+        self.blocks = [DecoderBlock(d_model, n_heads, rng, dtype) for _ in range(n_layers)]
+        self.ln_f = (np.ones(d_model, dtype=dtype), np.zeros(d_model, dtype=dtype))
+
+    def new_cache(self, batch):
+        return KVCache(len(self.blocks), batch, self.n_heads, self.max_len,
+                       self.d_model // self.n_heads, self.dtype)
+
+    def logits(self, tokens, cache=None, block_size=None):
+        """
+        参数:
+            tokens: (batch, n) 整数；有 cache 时是接在缓存之后的新 token
+            cache: 可选的 KVCache，调用后 cache.length 增加 n
+        返回:
+            (batch, n, vocab_size) 每个位置下一个 token 的 logits
+        """
+        start = 0 if cache is None else cache.length
+        n = tokens.shape[1]
+        x = self.embedding[tokens] * np.asarray(np.sqrt(self.d_model), dtype=self.dtype)
+        x += self.pe[start:start + n]
+        for layer, block in enumerate(self.blocks):
+            x = block(x, cache, layer, block_size)
+        if cache is not None:
+            cache.length += n
+        return layer_norm(x, *self.ln_f) @ self.embedding.T
+
+    def generate(self, prompt, n_new, use_cache=True, temperature=0.0, seed=None):
+        """
+        自回归生成
+
+        参数:
+            prompt: (batch, n) 或 (n,) 整数
+            n_new: 生成多少个新 token
+            use_cache: False 时每一步都把整个序列重新过一遍（用于对比）
+            temperature: 0 表示贪心取最大值，否则按 softmax(logits / temperature) 采样
+            seed: 采样用的随机种子
+        返回:
+            (batch, n + n_new) 整数，包含提示词
+        """
+        prompt = np.atleast_2d(prompt)
+        batch, n = prompt.shape
+        if n + n_new > self.max_len:
+            raise ValueError(f"{n + n_new} tokens exceed max_len={self.max_len}")
+        rng = np.random.default_rng(seed)
+        tokens = np.empty((batch, n + n_new), dtype=np.int64)
+        tokens[:, :n] = prompt
+
+        cache = self.new_cache(batch) if use_cache else None
+        # 有缓存时：第一步喂入整个提示词（prefill），之后每步只喂上一步生成的 token
+        new = tokens[:, :n]
+        for t in range(n, n + n_new):
+            if use_cache:
+                logits = self.logits(new, cache)[:, -1]
+            else:
+                logits = self.logits(tokens[:, :t])[:, -1]
+            tokens[:, t] = self._sample(logits, temperature, rng)
+            new = tokens[:, t:t + 1]
+        return tokens
+
+    @staticmethod
+    def _sample(logits, temperature, rng):
+        if temperature == 0:
+            return logits.argmax(axis=-1)
+        z = logits / temperature
+        p = np.exp(z - z.max(axis=-1, keepdims=True))
+        p /= p.sum(axis=-1, keepdims=True)
+        # 每一行按累积概率做一次逆变换采样
+        u = rng.random((len(p), 1))
+        return np.minimum((p.cumsum(axis=-1) < u).sum(axis=-1), p.shape[-1] - 1)